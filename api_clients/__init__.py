@@ -1,5 +1,19 @@
 from .evaluation_client import OpenAIClient
 from .exceptions import APIError
+from .exceptions import ResponseFormatError
+from .http import create_http_client
+from .packed_evaluation import PackedEvaluator
+from .rate_limit import RateLimiterRegistry
+from .response_cache import ResponseCache
 from .translation_client import TranslationAPIClient
 
-__all__ = ["TranslationAPIClient", "OpenAIClient", "APIError"]
+__all__ = [
+    "TranslationAPIClient",
+    "OpenAIClient",
+    "APIError",
+    "ResponseFormatError",
+    "create_http_client",
+    "ResponseCache",
+    "PackedEvaluator",
+    "RateLimiterRegistry",
+]
@@ -1,31 +1,86 @@
+import asyncio
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar
 
-from config import HTTP_TIMEOUT
 from config import OPENAI_API_CONFIG
 import httpx
+from utils.metrics import record_usage
 
 from .exceptions import APIError
+from .exceptions import ResponseFormatError
+from .http import BaseAPIClient
+from .rate_limit import RateLimiterRegistry
+from .response_cache import response_cache_key
+from .response_cache import ResponseCache
 
+T = TypeVar("T")
 
-class OpenAIClient:
+# Categories the LLM judge may assign, best first
+EVALUATION_CATEGORIES = ["excellent", "very good", "good", "bad", "very bad"]
 
-    def __init__(self):
+
+class OpenAIClient(BaseAPIClient):
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        response_cache: Optional[ResponseCache] = None,
+        rate_limiters: Optional[RateLimiterRegistry] = None,
+    ):
+        super().__init__(http_client, rate_limiters)
         self.base_url = OPENAI_API_CONFIG["base_url"]
         self.api_key = OPENAI_API_CONFIG["api_key"]
+        self.response_cache = response_cache
 
     def _get_completion_url(self, model_name: str) -> str:
         """Construct the completion URL for the specified model."""
         return f"{self.base_url}/{model_name}/chat/completions"
 
-    async def get_translation(
+    async def _chat_completion(
         self,
-        source_text: str,
-        source_language: str,
-        target_language: str,
         model_name: str,
+        payload: Dict[str, Any],
+        parse: Callable[[Dict[str, Any]], T],
+        use_cache: bool = True,
+    ) -> T:
+        """
+        Send a chat completion request, serving repeats from the response cache.
+
+        Only responses that parse successfully are cached, so a malformed
+        answer is retried on the next call instead of being replayed.
+        """
+        url = self._get_completion_url(model_name)
+        cache = self.response_cache if use_cache else None
+        cache_key = response_cache_key(model_name, url, payload) if cache else None
+
+        if cache is not None:
+            # SQLite calls run in a worker thread, off the shared event loop
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except APIError:
+                    pass
+
+        headers = {"Content-Type": "application/json", "api-key": self.api_key}
+        response = await self._post(
+            url, payload, headers, limiter_key=f"llm:{model_name}"
+        )
+        response.raise_for_status()
+        response_data = response.json()
+        # Tokens are billed whether or not the answer parses
+        if isinstance(response_data.get("usage"), dict):
+            record_usage(model_name, response_data["usage"])
+        parsed = parse(response_data)
+
+        if cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, response_data)
+        return parsed
+
+    def _build_translation_payload(
+        self, source_text: str, source_language: str, target_language: str
     ) -> Dict[str, Any]:
-        """Get translation using OpenAI."""
+        """Build the chat completion payload for a plain translation."""
         translation_prompt = f"""You are an expert translator with deep knowledge of both {source_language} and {target_language}.
 Please translate the following text from {source_language} to {target_language}.
 
@@ -34,7 +89,7 @@ SOURCE TEXT ({source_language}):
 
 Provide ONLY the translation in {target_language}, with no additional comments or explanations."""
 
-        payload = {
+        return {
             "messages": [
                 {
                     "role": "system",
@@ -44,19 +99,190 @@ Provide ONLY the translation in {target_language}, with no additional comments o
             ]
         }
 
-        headers = {"Content-Type": "application/json", "api-key": self.api_key}
+    async def get_translation(
+        self,
+        source_text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Get translation using OpenAI."""
+        payload = self._build_translation_payload(
+            source_text, source_language, target_language
+        )
 
         try:
-            url = self._get_completion_url(model_name)
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                response = await client.post(url, json=payload, headers=headers)
+            return await self._chat_completion(
+                model_name, payload, self._process_translation_response, use_cache
+            )
+        except httpx.HTTPError as e:
+            raise APIError(f"OpenAI API error: {str(e)}")
+        except Exception as e:
+            raise APIError(f"Unexpected error during translation: {str(e)}")
+
+    async def stream_translation(
+        self,
+        source_text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a translation using OpenAI, yielding text deltas as they arrive.
+
+        The request is the same as get_translation with `stream: true`, and
+        it shares get_translation's cache entry: a cached translation is
+        yielded in one piece, and a completed stream is cached for both.
+        The stream asks for a final usage chunk, so its tokens are counted
+        like those of a non-streamed request.
+        """
+        payload = self._build_translation_payload(
+            source_text, source_language, target_language
+        )
+        url = self._get_completion_url(model_name)
+        cache = self.response_cache if use_cache else None
+        cache_key = response_cache_key(model_name, url, payload) if cache else None
+
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                try:
+                    yield self._process_translation_response(cached)["text"]
+                    return
+                except APIError:
+                    pass
+
+        headers = {"Content-Type": "application/json", "api-key": self.api_key}
+        parts: List[str] = []
+        try:
+            async with self._stream(
+                url,
+                {
+                    **payload,
+                    "stream": True,
+                    "stream_options": {"include_usage": True},
+                },
+                headers,
+                limiter_key=f"llm:{model_name}",
+            ) as response:
                 response.raise_for_status()
-                response_data = response.json()
-                if "choices" not in response_data or not response_data["choices"]:
-                    raise APIError("Invalid response format from OpenAI API")
-                return {
-                    "text": response_data["choices"][0]["message"]["content"].strip()
-                }
+                async for line in response.aiter_lines():
+                    chunk = self._parse_stream_line(line)
+                    if chunk is None:
+                        break
+                    # The usage chunk comes last, with an empty "choices"
+                    if isinstance(chunk.get("usage"), dict):
+                        record_usage(model_name, chunk["usage"])
+                    delta = self._stream_delta(chunk)
+                    if delta:
+                        # Mirror get_translation, which strips the full text
+                        if not parts:
+                            delta = delta.lstrip()
+                            if not delta:
+                                continue
+                        parts.append(delta)
+                        yield delta
+        except httpx.HTTPError as e:
+            raise APIError(f"OpenAI API error: {str(e)}")
+        except APIError:
+            raise
+        except Exception as e:
+            raise APIError(f"Unexpected error during translation: {str(e)}")
+
+        if cache is not None and parts:
+            text = "".join(parts).strip()
+            await asyncio.to_thread(
+                cache.set,
+                cache_key,
+                {"choices": [{"message": {"role": "assistant", "content": text}}]},
+            )
+
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse one server-sent event line of a streamed chat completion.
+
+        Returns:
+            The chunk ({} for lines without data), or None once the stream
+            signals completion.
+        """
+        if not line.startswith("data:"):
+            return {}
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise APIError(f"Failed to parse streamed LLM response: {str(e)}")
+        return chunk if isinstance(chunk, dict) else {}
+
+    @staticmethod
+    def _stream_delta(chunk: Dict[str, Any]) -> str:
+        """The content delta of a stream chunk ("" for chunks without text)."""
+        choices = chunk.get("choices") or []
+        if not choices:
+            return ""
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+    async def get_segment_translations(
+        self,
+        segments: List[str],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Get a line-aligned translation using OpenAI, one output per segment."""
+        numbered_segments = json.dumps(
+            [{"id": i, "text": segment} for i, segment in enumerate(segments)],
+            ensure_ascii=False,
+            indent=2,
+        )
+        translation_prompt = f"""You are an expert translator with deep knowledge of both {source_language} and {target_language}.
+Please translate each of the following segments from {source_language} to {target_language}.
+Translate every segment on its own; do not merge, split, reorder or skip segments.
+
+SOURCE SEGMENTS ({source_language}):
+{numbered_segments}
+
+IMPORTANT: Respond ONLY with a JSON object in this exact format, with exactly {len(segments)} entries in the same order:
+{{
+    "translations": ["<translation of segment 0>", "<translation of segment 1>", ...]
+}}"""
+
+        payload = {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert bilingual translator. Translate the text accurately while preserving meaning, tone, and cultural nuances. Respond only with the requested JSON.",
+                },
+                {"role": "user", "content": translation_prompt},
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+        def parse(response_data: Dict[str, Any]) -> Dict[str, Any]:
+            translations = self._process_evaluation_response(response_data).get(
+                "translations"
+            )
+            if not isinstance(translations, list) or len(translations) != len(
+                segments
+            ):
+                raise APIError(
+                    "LLM returned a translation that is not aligned with the "
+                    f"{len(segments)} source segments"
+                )
+            return {
+                "segments": [str(translation).strip() for translation in translations]
+            }
+
+        try:
+            return await self._chat_completion(model_name, payload, parse, use_cache)
+        except APIError:
+            raise
         except httpx.HTTPError as e:
             raise APIError(f"OpenAI API error: {str(e)}")
         except Exception as e:
@@ -70,6 +296,7 @@ Provide ONLY the translation in {target_language}, with no additional comments o
         target_language: str,
         model_name: str,
         reference_translation: Optional[str] = None,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """Evaluate translation quality using OpenAI."""
         evaluation_prompt = self._create_evaluation_prompt(
@@ -91,14 +318,181 @@ Provide ONLY the translation in {target_language}, with no additional comments o
             "response_format": {"type": "json_object"},
         }
 
-        headers = {"Content-Type": "application/json", "api-key": self.api_key}
+        try:
+            return await self._chat_completion(
+                model_name, payload, self._process_evaluation_response, use_cache
+            )
+        except httpx.HTTPError as e:
+            raise APIError(f"OpenAI API error: {str(e)}")
+        except Exception as e:
+            raise APIError(f"Unexpected error during evaluation: {str(e)}")
+
+    async def evaluate_packed(
+        self,
+        items: List[Dict[str, str]],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        use_cache: bool = True,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Evaluate many short segments in one request.
+
+        Each item has "source", "reference" and "candidate"; its position in
+        `items` is its id. The instructions are sent once for the whole
+        packet, and the model answers with one {id, category, reason} entry
+        per segment.
+
+        Returns:
+            Evaluations by id for the entries that came back valid. Missing
+            or malformed entries are left out for the caller to retry.
+            Raises ResponseFormatError when no entry is usable.
+        """
+        packed_segments = json.dumps(
+            [
+                {
+                    "id": i,
+                    "source": item["source"],
+                    "reference": item["reference"],
+                    "candidate": item["candidate"],
+                }
+                for i, item in enumerate(items)
+            ],
+            ensure_ascii=False,
+            indent=2,
+        )
+        evaluation_prompt = f"""You are an expert translation evaluator with deep knowledge of both {source_language} and {target_language}.
+Evaluate each of the following segments on its own. Every segment has a source text ({source_language}), a reference translation and a candidate translation ({target_language}).
+
+SEGMENTS:
+{packed_segments}
+
+For each segment, compare the candidate with the reference for accuracy, fluency, faithfulness of style and tone, and technical quality (omissions, terminology, proper nouns, numbers, formatting), while checking accuracy to the source.
+
+Classify each candidate into ONE of these categories:
+- excellent: Near perfect match with reference translation
+- very good: High similarity with only minor differences
+- good: Acceptable similarity with some noticeable differences
+- bad: Significant differences from reference translation
+- very bad: Major deviations making it unsuitable
+
+IMPORTANT: Respond ONLY with a JSON object in this exact format, with exactly one entry for each of the {len(items)} segment ids:
+{{
+    "evaluations": [
+        {{"id": <segment id>, "category": "<category>", "reason": "<concise explanation>"}},
+        ...
+    ]
+}}"""
+
+        payload = {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert bilingual evaluator tasked with judging the quality of translations. For every segment, assess how well the candidate translation matches the reference while maintaining accuracy to the source. Your evaluations must be precise, unbiased, and clearly reasoned. Respond only with the requested JSON.",
+                },
+                {"role": "user", "content": evaluation_prompt},
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+        def parse(response_data: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+            parsed = self._process_evaluation_response(response_data)
+            # A bare array is accepted as well as the requested object
+            entries = parsed.get("evaluations") if isinstance(parsed, dict) else parsed
+            if not isinstance(entries, list):
+                raise ResponseFormatError("LLM response has no evaluations list")
+
+            evaluations: Dict[int, Dict[str, Any]] = {}
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                segment_id = entry.get("id")
+                category = entry.get("category")
+                reason = entry.get("reason")
+                if (
+                    isinstance(segment_id, int)
+                    and 0 <= segment_id < len(items)
+                    and isinstance(category, str)
+                    and category.lower() in EVALUATION_CATEGORIES
+                    and isinstance(reason, str)
+                ):
+                    evaluations.setdefault(
+                        segment_id, {"category": category.lower(), "reason": reason}
+                    )
+            # Raising keeps an unusable answer out of the response cache
+            if not evaluations:
+                raise ResponseFormatError("LLM response has no valid evaluations")
+            return evaluations
 
         try:
-            url = self._get_completion_url(model_name)
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                return self._process_evaluation_response(response.json())
+            return await self._chat_completion(model_name, payload, parse, use_cache)
+        except APIError:
+            raise
+        except httpx.HTTPError as e:
+            raise APIError(f"OpenAI API error: {str(e)}")
+        except Exception as e:
+            raise APIError(f"Unexpected error during evaluation: {str(e)}")
+
+    async def translate_and_evaluate(
+        self,
+        source_text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_translation: str,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Translate and self-assess against the reference in a single request.
+
+        Raises ResponseFormatError when the answer does not match the schema,
+        so callers can fall back to get_translation + evaluate_translation.
+        """
+        prompt = f"""You are an expert translator and translation evaluator with deep knowledge of both {source_language} and {target_language}.
+
+Step 1: Translate the SOURCE TEXT from {source_language} to {target_language}, preserving meaning, tone, and cultural nuances.
+Step 2: Compare your translation with the REFERENCE TRANSLATION for accuracy, fluency, faithfulness of style and tone, and technical quality (omissions, terminology, proper nouns, numbers, formatting).
+
+SOURCE TEXT ({source_language}):
+{source_text}
+
+REFERENCE TRANSLATION ({target_language}):
+{reference_translation}
+
+Classify your translation into ONE of these categories:
+- excellent: Near perfect match with reference translation
+- very good: High similarity with only minor differences
+- good: Acceptable similarity with some noticeable differences
+- bad: Significant differences from reference translation
+- very bad: Major deviations making it unsuitable
+
+IMPORTANT: Respond ONLY with a JSON object in this exact format:
+{{
+    "translation": "<your translation in {target_language}>",
+    "category": "<category>",
+    "reason": "<concise explanation of how your translation matches the reference while maintaining accuracy to the source>"
+}}"""
+
+        payload = {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert bilingual translator and evaluator. Translate accurately, then judge your translation against the reference precisely and without bias. Respond only with the requested JSON.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+        try:
+            return await self._chat_completion(
+                model_name,
+                payload,
+                self._process_translation_evaluation_response,
+                use_cache,
+            )
+        except APIError:
+            raise
         except httpx.HTTPError as e:
             raise APIError(f"OpenAI API error: {str(e)}")
         except Exception as e:
@@ -162,6 +556,14 @@ IMPORTANT: Respond ONLY with a JSON object in this exact format:
 
 Your reason should be clear, specific, and reference actual content from both translations."""
 
+    def _process_translation_response(
+        self, response_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Extract the translated text from a chat completion response."""
+        if "choices" not in response_data or not response_data["choices"]:
+            raise APIError("Invalid response format from OpenAI API")
+        return {"text": response_data["choices"][0]["message"]["content"].strip()}
+
     def _process_evaluation_response(
         self, response_data: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -179,4 +581,34 @@ Your reason should be clear, specific, and reference actual content from both tr
         try:
             return json.loads(content)
         except json.JSONDecodeError as e:
-            raise APIError(f"Failed to parse LLM response as JSON: {str(e)}")
+            raise ResponseFormatError(
+                f"Failed to parse LLM response as JSON: {str(e)}"
+            )
+
+    def _process_translation_evaluation_response(
+        self, response_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Parse and validate a combined translation + self-assessment response."""
+        parsed = self._process_evaluation_response(response_data)
+        if not isinstance(parsed, dict):
+            raise ResponseFormatError("LLM response is not a JSON object")
+
+        translation = parsed.get("translation")
+        category = parsed.get("category")
+        reason = parsed.get("reason")
+        if not isinstance(translation, str) or not translation.strip():
+            raise ResponseFormatError("LLM response has no translation")
+        if (
+            not isinstance(category, str)
+            or category.lower() not in EVALUATION_CATEGORIES
+        ):
+            raise ResponseFormatError(
+                f"LLM response has invalid category: {category!r}"
+            )
+        if not isinstance(reason, str):
+            raise ResponseFormatError("LLM response has no reason")
+
+        return {
+            "translation": translation.strip(),
+            "evaluation": {"category": category.lower(), "reason": reason},
+        }
@@ -2,3 +2,9 @@ class APIError(Exception):
     """Custom exception for API related errors"""
 
     pass
+
+
+class ResponseFormatError(APIError):
+    """LLM response that does not match the expected structure"""
+
+    pass
@@ -0,0 +1,202 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config import HTTP_POOL_CONFIG
+from config import HTTP_TIMEOUT
+from config import RETRY_CONFIG
+import httpx
+from utils.metrics import metrics
+
+from .rate_limit import backoff_delay
+from .rate_limit import DeploymentLimiter
+from .rate_limit import parse_retry_after
+from .rate_limit import RateLimiterRegistry
+
+
+def create_http_client(
+    pool_config: Optional[Dict[str, Any]] = None,
+) -> httpx.AsyncClient:
+    """
+    Create the long-lived, pooled HTTP client shared by the API clients.
+
+    Args:
+        pool_config: Optional overrides for HTTP_POOL_CONFIG
+
+    Returns:
+        An httpx.AsyncClient with keep-alive connection pooling.
+    """
+    settings = {**HTTP_POOL_CONFIG, **(pool_config or {})}
+
+    http2 = settings["http2"]
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            # HTTP/2 is an optimization only; fall back to HTTP/1.1 keep-alive
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    return httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=limits, http2=http2)
+
+
+class BaseAPIClient:
+    """Common HTTP plumbing for the Fragma API clients."""
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiters: Optional[RateLimiterRegistry] = None,
+    ):
+        # Borrowed from the owner (usually TranslationService); never closed here
+        self.http_client = http_client
+        self.rate_limiters = rate_limiters
+
+    async def _send(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> httpx.Response:
+        """POST through the shared pool, or a one-off client if none was given."""
+        if self.http_client is not None:
+            return await self.http_client.post(url, json=payload, headers=headers)
+        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+            return await client.post(url, json=payload, headers=headers)
+
+    def _limiter(self, limiter_key: Optional[str]) -> Optional[DeploymentLimiter]:
+        if self.rate_limiters is None or not limiter_key:
+            return None
+        return self.rate_limiters.get(limiter_key)
+
+    @staticmethod
+    def _retry_delay(
+        limiter: Optional[DeploymentLimiter],
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+    ) -> Optional[float]:
+        """
+        Decide whether an attempt should be retried.
+
+        Args:
+            limiter: Limiter of the deployment, if any
+            attempt: Zero-based attempt number
+            response: The response, or None after a transport error
+
+        Returns:
+            Seconds to wait before retrying, or None to stop.
+        """
+        retry_after = None
+        if response is not None:
+            if response.status_code not in RETRY_CONFIG["retry_statuses"]:
+                if limiter:
+                    limiter.on_success()
+                return None
+            retry_after = parse_retry_after(response)
+            if limiter and response.status_code in (429, 503):
+                limiter.on_throttle(retry_after)
+
+        if attempt >= RETRY_CONFIG["max_retries"]:
+            if limiter:
+                limiter.counters["failures"] += 1
+            return None
+        if limiter:
+            limiter.counters["retries"] += 1
+        return max(backoff_delay(attempt), retry_after or 0.0)
+
+    async def _post(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        limiter_key: Optional[str] = None,
+    ) -> httpx.Response:
+        """
+        POST with per-deployment rate limiting and retries.
+
+        Throttling (429/503) and transient failures are retried with jittered
+        exponential backoff, waiting at least as long as any Retry-After
+        header asks. The last response is returned once retries run out, so
+        callers still see the final HTTP status.
+        """
+        limiter = self._limiter(limiter_key)
+        target = limiter_key or url
+        attempt = 0
+        while True:
+            try:
+                async with limiter.slot() if limiter else nullcontext():
+                    with metrics.span("upstream_request", target=target):
+                        response = await self._send(url, payload, headers)
+            except httpx.TransportError:
+                self._record_attempt(target)
+                delay = self._retry_delay(limiter, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._record_attempt(target, response)
+                delay = self._retry_delay(limiter, attempt, response)
+                if delay is None:
+                    return response
+            metrics.inc("upstream_retries_total", target=target)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _record_attempt(
+        target: str, response: Optional[httpx.Response] = None
+    ) -> None:
+        """Count one upstream attempt by HTTP status ("error" if none came back)."""
+        status = response.status_code if response is not None else "error"
+        metrics.inc("upstream_responses_total", target=target, status=status)
+
+    @asynccontextmanager
+    async def _stream(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        limiter_key: Optional[str] = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        POST and yield the response before its body is read.
+
+        Retries follow _post, but only until the response headers arrive;
+        once the body is being consumed a failure propagates to the caller.
+        The deployment's concurrency slot is held until the stream closes.
+        """
+        limiter = self._limiter(limiter_key)
+        target = limiter_key or url
+        async with AsyncExitStack() as stack:
+            client = self.http_client or await stack.enter_async_context(
+                httpx.AsyncClient(timeout=HTTP_TIMEOUT)
+            )
+            attempt = 0
+            while True:
+                async with limiter.slot() if limiter else nullcontext():
+                    try:
+                        request = client.build_request(
+                            "POST", url, json=payload, headers=headers
+                        )
+                        with metrics.span("upstream_request", target=target):
+                            response = await client.send(request, stream=True)
+                    except httpx.TransportError:
+                        self._record_attempt(target)
+                        delay = self._retry_delay(limiter, attempt)
+                        if delay is None:
+                            raise
+                    else:
+                        self._record_attempt(target, response)
+                        delay = self._retry_delay(limiter, attempt, response)
+                        if delay is None:
+                            try:
+                                yield response
+                            finally:
+                                await response.aclose()
+                            return
+                        await response.aclose()
+                metrics.inc("upstream_retries_total", target=target)
+                attempt += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,226 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import PACKED_EVALUATION_CONFIG
+from utils.metrics import current_usage
+from utils.metrics import metrics
+from utils.metrics import track_usage
+
+from .evaluation_client import OpenAIClient
+from .exceptions import ResponseFormatError
+
+# (model, source language, target language, use_cache): only segments that
+# share all four can go into one packed request
+PacketKey = Tuple[str, str, str, bool]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count without a tokenizer: about four ASCII characters per
+    token, and one token per other character (CJK, accented letters).
+    """
+    ascii_characters = sum(1 for character in text if character.isascii())
+    return ascii_characters // 4 + (len(text) - ascii_characters) + 1
+
+
+class _PendingEvaluation:
+    """A segment waiting for its verdict, and how often it was sent packed."""
+
+    __slots__ = ("item", "tokens", "future", "rounds", "usage")
+
+    def __init__(self, item: Dict[str, str], future: "asyncio.Future[Dict]"):
+        self.item = item
+        self.tokens = sum(estimate_tokens(text) for text in item.values())
+        self.future = future
+        self.rounds = 0
+        # The caller's per-request usage, charged its share of each packet
+        self.usage = current_usage()
+
+
+def _share_usage(packet: List[_PendingEvaluation], usage: Dict[str, int]) -> None:
+    """
+    Split a request's token usage across the callers of its segments, in
+    proportion to each segment's estimated tokens.
+    """
+    weights = [pending.tokens for pending in packet]
+    total = sum(weights)
+    for field, count in usage.items():
+        shares = [count * weight // total for weight in weights]
+        shares[-1] += count - sum(shares)
+        for pending, share in zip(packet, shares):
+            if pending.usage is not None:
+                pending.usage[field] += share
+
+
+class PackedEvaluator:
+    """
+    Packs concurrent evaluate_translation calls into multi-segment requests.
+
+    Calls for the same model and language pair are queued for up to
+    max_wait seconds, or until the queued segments reach max_packet_tokens
+    or max_segments, and are then judged in one OpenAIClient.evaluate_packed
+    request. Segments whose entry comes back missing or malformed are
+    queued again, up to max_rounds packed attempts, and are then evaluated
+    on their own. Segments above max_segment_tokens always go alone.
+
+    Packets are sent from their own tasks, so the tokens of each request
+    (retries included) are split across its segments' callers by
+    _share_usage rather than charged to whichever caller started it.
+    """
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        max_packet_tokens: int = PACKED_EVALUATION_CONFIG["max_packet_tokens"],
+        max_segment_tokens: int = PACKED_EVALUATION_CONFIG["max_segment_tokens"],
+        max_segments: int = PACKED_EVALUATION_CONFIG["max_segments"],
+        max_wait: float = PACKED_EVALUATION_CONFIG["max_wait"],
+        max_rounds: int = PACKED_EVALUATION_CONFIG["max_rounds"],
+    ):
+        self.client = client
+        self.max_packet_tokens = max_packet_tokens
+        self.max_segment_tokens = max_segment_tokens
+        self.max_segments = max_segments
+        self.max_wait = max_wait
+        self.max_rounds = max_rounds
+        self._queues: Dict[PacketKey, List[_PendingEvaluation]] = {}
+        self._timers: Dict[PacketKey, asyncio.TimerHandle] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def evaluate(
+        self,
+        source_text: str,
+        translated_text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_translation: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Evaluate one segment; same arguments as evaluate_translation."""
+        item = {
+            "source": source_text,
+            "reference": reference_translation or "Not provided",
+            "candidate": translated_text,
+        }
+        pending = _PendingEvaluation(item, asyncio.get_running_loop().create_future())
+        key = (model_name, source_language, target_language, use_cache)
+        if pending.tokens > self.max_segment_tokens:
+            self._spawn(self._evaluate_alone(key, pending))
+        else:
+            self._enqueue(key, pending)
+        return await pending.future
+
+    def close(self) -> None:
+        """Cancel queued and in-flight packets."""
+        for timer in self._timers.values():
+            timer.cancel()
+        for task in self._tasks:
+            task.cancel()
+        for queue in self._queues.values():
+            for pending in queue:
+                pending.future.cancel()
+        self._timers.clear()
+        self._queues.clear()
+
+    def _enqueue(self, key: PacketKey, pending: _PendingEvaluation) -> None:
+        queue = self._queues.setdefault(key, [])
+        queue.append(pending)
+        if (
+            len(queue) >= self.max_segments
+            or sum(p.tokens for p in queue) >= self.max_packet_tokens
+        ):
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush, key
+            )
+
+    def _flush(self, key: PacketKey) -> None:
+        """Send everything queued under key, split into packets by budget."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        # Callers that gave up (cancelled) are dropped before sending
+        queue = [p for p in self._queues.pop(key, []) if not p.future.done()]
+
+        packet: List[_PendingEvaluation] = []
+        tokens = 0
+        for pending in queue:
+            if packet and (
+                len(packet) >= self.max_segments
+                or tokens + pending.tokens > self.max_packet_tokens
+            ):
+                self._spawn(self._send(key, packet))
+                packet, tokens = [], 0
+            packet.append(pending)
+            tokens += pending.tokens
+        if packet:
+            self._spawn(self._send(key, packet))
+
+    def _spawn(self, coroutine: Any) -> None:
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: PacketKey, packet: List[_PendingEvaluation]) -> None:
+        model_name, source_language, target_language, use_cache = key
+        metrics.inc("packed_evaluation_requests_total", model=model_name)
+        metrics.inc("packed_evaluation_segments_total", len(packet), model=model_name)
+        usage = track_usage()
+        try:
+            evaluations = await self.client.evaluate_packed(
+                [pending.item for pending in packet],
+                source_language,
+                target_language,
+                model_name,
+                use_cache=use_cache,
+            )
+        except ResponseFormatError:
+            evaluations = {}
+        except Exception as e:
+            for pending in packet:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        finally:
+            _share_usage(packet, usage)
+
+        for segment_id, pending in enumerate(packet):
+            if pending.future.done():
+                continue
+            if segment_id in evaluations:
+                pending.future.set_result(evaluations[segment_id])
+                continue
+            metrics.inc("packed_evaluation_requeued_total", model=model_name)
+            pending.rounds += 1
+            if pending.rounds < self.max_rounds:
+                self._enqueue(key, pending)
+            else:
+                self._spawn(self._evaluate_alone(key, pending))
+
+    async def _evaluate_alone(
+        self, key: PacketKey, pending: _PendingEvaluation
+    ) -> None:
+        """Fall back to a single-segment evaluate_translation request."""
+        model_name, source_language, target_language, use_cache = key
+        usage = track_usage()
+        try:
+            evaluation = await self.client.evaluate_translation(
+                pending.item["source"],
+                pending.item["candidate"],
+                source_language,
+                target_language,
+                model_name,
+                reference_translation=pending.item["reference"],
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            return
+        finally:
+            _share_usage([pending], usage)
+        if not pending.future.done():
+            pending.future.set_result(evaluation)
@@ -0,0 +1,153 @@
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config import RATE_LIMIT_CONFIG
+from config import RETRY_CONFIG
+import httpx
+
+
+class TokenBucket:
+    """Async token bucket allowing `rate` requests per second with bursts."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds`, e.g. after a Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit: grows by one slot per window of successes and
+    halves on every throttle, settling just below the deployment's quota.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class DeploymentLimiter:
+    """Rate and concurrency limits plus counters for one upstream deployment."""
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.bucket = TokenBucket(settings["requests_per_second"], settings["burst"])
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            settings["initial_concurrency"],
+            settings["min_concurrency"],
+            settings["max_concurrency"],
+        )
+        self.counters = {"requests": 0, "throttled": 0, "retries": 0, "failures": 0}
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a token and a concurrency slot for one request attempt."""
+        await self.bucket.acquire()
+        await self.concurrency.acquire()
+        try:
+            self.counters["requests"] += 1
+            yield
+        finally:
+            await self.concurrency.release()
+
+    def on_success(self) -> None:
+        self.concurrency.on_success()
+
+    def on_throttle(self, retry_after: Optional[float]) -> None:
+        self.counters["throttled"] += 1
+        self.concurrency.on_throttle()
+        if retry_after:
+            self.bucket.pause(retry_after)
+
+
+class RateLimiterRegistry:
+    """Lazily created DeploymentLimiter per key, e.g. "llm:gpt-4o"."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or RATE_LIMIT_CONFIG
+        self._limiters: Dict[str, DeploymentLimiter] = {}
+
+    def get(self, key: str) -> DeploymentLimiter:
+        if key not in self._limiters:
+            settings = {
+                **self.config["default"],
+                **self.config["deployments"].get(key, {}),
+            }
+            self._limiters[key] = DeploymentLimiter(settings)
+        return self._limiters[key]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters and current concurrency limit per deployment."""
+        return {
+            key: {
+                **limiter.counters,
+                "concurrency_limit": int(limiter.concurrency.limit),
+            }
+            for key, limiter in self._limiters.items()
+        }
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Read Retry-After as seconds, accepting both delta-seconds and HTTP dates."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given zero-based retry attempt."""
+    ceiling = min(RETRY_CONFIG["max_delay"], RETRY_CONFIG["base_delay"] * 2**attempt)
+    return random.uniform(0, ceiling)
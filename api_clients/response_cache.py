@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def response_cache_key(model_name: str, url: str, payload: Dict[str, Any]) -> str:
+    """Hash a request so identical prompts to the same deployment share a key."""
+    request = json.dumps(
+        {"model": model_name, "url": url, "payload": payload},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache for chat-completion responses.
+
+    Entries expire after ttl_seconds. Once the table grows past max_entries,
+    the least recently used entries are evicted. Hits only read: their access
+    times are kept in memory and written in one batch every ACCESS_BATCH
+    hits and before each eviction.
+    """
+
+    # Eviction runs every N writes rather than on each insert
+    EVICT_EVERY = 100
+    # Pending access times written per batch
+    ACCESS_BATCH = 100
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Access times of hits not yet written, by key
+        self._accessed: Dict[str, float] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # A cache can lose its last commits on power loss; skip the fsyncs
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= self.ACCESS_BATCH:
+                self._write_accessed()
+                self._connection.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response, evicting old entries periodically."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond the bound."""
+        self._write_accessed()
+        self._connection.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self._connection.execute(
+            """DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+    def _write_accessed(self) -> None:
+        """Write the pending access times of hits."""
+        self._connection.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_accessed()
+            self._connection.commit()
+            self._connection.close()
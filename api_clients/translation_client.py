@@ -1,15 +1,23 @@
+import asyncio
 from typing import Any, Dict, List, Optional
 
-from config import HTTP_TIMEOUT
 from config import TRANSLATION_API_CONFIG
+from config import TRANSLATION_CHUNK_CONFIG
 import httpx
 
 from .exceptions import APIError
+from .http import BaseAPIClient
+from .rate_limit import RateLimiterRegistry
 
 
-class TranslationAPIClient:
+class TranslationAPIClient(BaseAPIClient):
 
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiters: Optional[RateLimiterRegistry] = None,
+    ):
+        super().__init__(http_client, rate_limiters)
         self.base_url = TRANSLATION_API_CONFIG["base_url"]
         self.api_key = TRANSLATION_API_CONFIG["api_key"]
 
@@ -20,10 +28,28 @@ class TranslationAPIClient:
         target_lang: str,
         endpoint_url: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Call the translation API endpoint."""
+        """
+        Call the translation API endpoint.
+
+        Large inputs are split into chunks bounded by line count and byte size
+        (TRANSLATION_CHUNK_CONFIG) that are sent concurrently. The per-chunk
+        translations are reassembled in input order as one "translations"
+        list; a single chunk returns the endpoint's response unchanged.
+        """
         # Use provided endpoint URL if available, otherwise construct from base_url
         url = endpoint_url if endpoint_url else f"{self.base_url}/pre/translate"
 
+        chunks = self._chunk_segments(text_list)
+        if len(chunks) <= 1:
+            return await self._translate_chunk(url, text_list, source_lang, target_lang)
+
+        responses = await self._translate_chunks(url, chunks, source_lang, target_lang)
+        return self._merge_chunk_responses(responses)
+
+    async def _translate_chunk(
+        self, url: str, text_list: List[str], source_lang: str, target_lang: str
+    ) -> Dict[str, Any]:
+        """Send one request to the translation endpoint."""
         payload = {
             "text": text_list,
             "source_lang": source_lang,
@@ -32,11 +58,90 @@ class TranslationAPIClient:
         headers = {"Content-Type": "application/json", "Authorization": self.api_key}
 
         try:
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                return response.json()
+            response = await self._post(
+                url, payload, headers, limiter_key=f"translation:{url}"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             raise APIError(f"Translation API error: {str(e)}")
         except Exception as e:
             raise APIError(f"Unexpected error during translation: {str(e)}")
+
+    async def _translate_chunks(
+        self,
+        url: str,
+        chunks: List[List[str]],
+        source_lang: str,
+        target_lang: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Translate chunks concurrently, re-sending only the chunks that failed.
+
+        Returns:
+            One endpoint response per chunk, in chunk order.
+        """
+        semaphore = asyncio.Semaphore(TRANSLATION_CHUNK_CONFIG["concurrency"])
+
+        async def send(chunk: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._translate_chunk(url, chunk, source_lang, target_lang)
+
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        pending = list(range(len(chunks)))
+        for round_number in range(TRANSLATION_CHUNK_CONFIG["retries"] + 1):
+            outcomes = await asyncio.gather(
+                *(send(chunks[i]) for i in pending), return_exceptions=True
+            )
+            failed = []
+            for i, outcome in zip(pending, outcomes):
+                if isinstance(outcome, BaseException):
+                    failed.append((i, outcome))
+                else:
+                    responses[i] = outcome
+            if not failed:
+                return responses
+            pending = [i for i, _ in failed]
+
+        first_index, first_error = failed[0]
+        raise APIError(
+            f"{len(failed)} of {len(chunks)} translation chunks failed "
+            f"(chunk {first_index}: {first_error})"
+        )
+
+    @staticmethod
+    def _chunk_segments(text_list: List[str]) -> List[List[str]]:
+        """Split segments into chunks bounded by line count and UTF-8 size."""
+        max_lines = TRANSLATION_CHUNK_CONFIG["max_lines"]
+        max_bytes = TRANSLATION_CHUNK_CONFIG["max_bytes"]
+
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_bytes = 0
+        for segment in text_list:
+            size = len(segment.encode("utf-8"))
+            # An oversized segment still goes out, alone in its own chunk
+            if current and (
+                len(current) >= max_lines or current_bytes + size > max_bytes
+            ):
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(segment)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _merge_chunk_responses(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Concatenate per-chunk translations into one ordered response."""
+        translations: List[Any] = []
+        for response in responses:
+            if "translations" in response:
+                translations.extend(response["translations"])
+            elif "text" in response:
+                text = response["text"]
+                translations.extend(text if isinstance(text, list) else [text])
+            else:
+                raise APIError("Unexpected translation response format")
+        return {"translations": translations}
@@ -1,5 +1,5 @@
-import asyncio
-from typing import Any, Dict
+import atexit
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from config import AVAILABLE_LANGUAGES
 from config import AVAILABLE_MODELS
@@ -8,12 +8,29 @@ from config import MODEL_CONFIG
 import streamlit as st
 
 from services import TranslationService
+from utils.edit_session import EditSession
+from utils.event_loop import BackgroundLoop
+
+
+@st.cache_resource
+def get_runtime() -> Tuple[BackgroundLoop, TranslationService]:
+    """
+    Return the process-wide event loop thread and service.
+
+    Shared by every session and rerun, so the connection pool, caches and
+    embedding model stay warm, and concurrent users only wait on their own
+    requests.
+    """
+    runner = BackgroundLoop()
+    service = TranslationService()
+    atexit.register(lambda: runner.run(service.aclose(), timeout=5))
+    return runner, service
 
 
 class TranslationUI:
 
-    def __init__(self):
-        self.service = TranslationService()
+    def __init__(self, service: TranslationService):
+        self.service = service
         self._setup_page()
         self._setup_sidebar()
 
@@ -65,7 +82,9 @@ class TranslationUI:
     """
         )
 
-    def render_input_section(self) -> tuple[str, str, str, bool, str, str]:
+    def render_input_section(
+        self,
+    ) -> tuple[str, str, str, bool, str, str, bool, bool, List[str], bool]:
         """Render the input section and return user inputs."""
         # Add endpoint input at the top
         endpoint_url = st.text_input(
@@ -105,17 +124,55 @@ class TranslationUI:
         evaluate_translation = st.checkbox("Evaluate translation with LLM", value=True)
 
         model_name = None
+        segment_aligned = False
+        use_cache = True
+        comparison_models: List[str] = []
+        single_pass = False
         if evaluate_translation:
             model_options = [(display, tech) for tech, display in MODEL_CONFIG.items()]
-            selected_display_name = st.selectbox(
-                "Select Model for Evaluation",
-                [display for display, _ in model_options],
-                index=2,
+            compare = st.checkbox(
+                "Compare multiple models",
+                value=False,
+                help="Evaluate several models concurrently against the same reference translation.",
             )
-            model_name = next(
-                tech
-                for display, tech in model_options
-                if display == selected_display_name
+            if compare:
+                selected_display_names = st.multiselect(
+                    "Select Models to Compare",
+                    [display for display, _ in model_options],
+                    default=[display for display, _ in model_options[:3]],
+                )
+                comparison_models = [
+                    tech
+                    for display, tech in model_options
+                    if display in selected_display_names
+                ]
+                model_name = comparison_models[0] if comparison_models else None
+            else:
+                selected_display_name = st.selectbox(
+                    "Select Model for Evaluation",
+                    [display for display, _ in model_options],
+                    index=2,
+                )
+                model_name = next(
+                    tech
+                    for display, tech in model_options
+                    if display == selected_display_name
+                )
+            segment_aligned = st.checkbox(
+                "Score each line separately",
+                value=False,
+                help="Translate line by line with the LLM and report a similarity score per line plus an aggregate.",
+            )
+            if not segment_aligned:
+                single_pass = st.checkbox(
+                    "Translate and evaluate in one request",
+                    value=False,
+                    help="Ask the LLM for its translation and self-assessment in a single call. Falls back to separate calls if the answer cannot be parsed.",
+                )
+            use_cache = st.checkbox(
+                "Reuse cached LLM responses",
+                value=True,
+                help="Serve identical LLM requests from the local response cache. Uncheck to force fresh calls.",
             )
 
         return (
@@ -125,26 +182,67 @@ class TranslationUI:
             evaluate_translation,
             model_name,
             endpoint_url,
+            segment_aligned,
+            use_cache,
+            comparison_models,
+            single_pass,
         )
 
-    def render_translation_results(self, result: Dict[str, Any]):
-        """Render translation and evaluation results."""
-        if not result["success"]:
-            st.error(result["error"])
-            return
+    def render_translation_results(
+        self,
+        result: Dict[str, Any],
+        candidate_stream: Optional[Iterator[str]] = None,
+    ):
+        """
+        Render translation and evaluation results.
+
+        With candidate_stream, the OpenAI translation is written token by token
+        as it arrives and `result` must be filled in once the stream ends.
+        """
+        # Status and reference go above the candidate, which may stream first
+        header = st.container()
+
+        if candidate_stream is not None:
+            st.subheader("OpenAI Translation")
+            st.write_stream(candidate_stream)
+            st.divider()
 
-        st.success("Translation completed!")
+        with header:
+            if not result["success"]:
+                st.error(result["error"])
+                return
+
+            st.success("Translation completed!")
+            incremental = result.get("incremental")
+            memory = result.get("translation_memory", {})
+            reused = [
+                label
+                for stage, label in (
+                    ("reference", "reference translation"),
+                    ("candidate", "LLM translation and similarity"),
+                )
+                if memory.get(stage, {}).get("session_hits")
+            ]
+            if incremental and incremental["unchanged"] and reused:
+                # Outside segment-aligned mode the LLM and embedder see the
+                # whole text, so only the reference is reused per line
+                st.caption(
+                    f"Reused the {' and '.join(reused)} of "
+                    f"{incremental['unchanged']} unchanged lines from the "
+                    f"previous run; {incremental['changed']} changed or new."
+                )
 
-        # Reference Translation
-        st.subheader("Reference Translation (Endpoint)")
-        st.write(result["reference_translation"])
-        st.divider()
+            # Reference Translation
+            st.subheader("Reference Translation (Endpoint)")
+            st.write(result["reference_translation"])
+            st.divider()
 
         # OpenAI Translation
         if "openai_translation" in result:
-            st.subheader("OpenAI Translation")
-            st.write(result["openai_translation"])
-            st.divider()
+            if candidate_stream is None:
+                st.subheader("OpenAI Translation")
+                st.write(result["openai_translation"])
+                st.divider()
 
             # Similarity Score
             if "similarity_score" in result:
@@ -160,6 +258,21 @@ class TranslationUI:
                     f"<span style='color: {color}; font-size: 20px;'>{similarity:.2%}</span>",
                     unsafe_allow_html=True,
                 )
+
+                # Per-line scores in segment-aligned mode
+                if "segment_scores" in result:
+                    st.dataframe(
+                        [
+                            {
+                                "Source": segment["source"],
+                                "Reference": segment["reference"],
+                                "Candidate": segment["candidate"],
+                                "Similarity": f"{segment['similarity']:.2%}",
+                            }
+                            for segment in result["segment_scores"]
+                        ],
+                        use_container_width=True,
+                    )
                 st.divider()
 
             # Evaluation Results
@@ -183,13 +296,110 @@ class TranslationUI:
                 st.markdown("**Detailed Analysis:**")
                 st.write(reason)
 
+                gate = result.get("evaluation_gate")
+                if gate:
+                    details = (
+                        f"chrF {gate['chrf']:.0%}, "
+                        f"length ratio {gate['length_ratio']:.2f}"
+                    )
+                    if gate["similarity"] is not None:
+                        details += f", cosine {gate['similarity']:.0%}"
+                    st.caption(f"Fast checks: {details}. LLM judge {gate['judge']}.")
+
+            # Near-duplicate sources evaluated before
+            if result.get("fuzzy_matches"):
+                with st.expander("Similar past evaluations"):
+                    st.dataframe(
+                        [
+                            {
+                                "Source": match["source"],
+                                "Reference": match["reference"],
+                                "Candidate": match["candidate"],
+                                "Model": MODEL_CONFIG.get(
+                                    match["model"], match["model"]
+                                ),
+                                "Category": match["category"],
+                                "Similarity": f"{match['score']:.2%}",
+                            }
+                            for match in result["fuzzy_matches"]
+                        ],
+                        use_container_width=True,
+                    )
+
+        self.render_timings(result)
+
+    def render_timings(self, result: Dict[str, Any]):
+        """Render a collapsible per-stage timing and token usage breakdown."""
+        if "timings" not in result:
+            return
+        with st.expander("Timing breakdown"):
+            st.dataframe(
+                [
+                    {"Stage": stage, "Duration (ms)": f"{seconds * 1000:.1f}"}
+                    for stage, seconds in result["timings"].items()
+                ],
+                use_container_width=True,
+            )
+            usage = result.get("usage")
+            if usage:
+                st.caption(
+                    f"LLM tokens: {usage['prompt_tokens']} prompt + "
+                    f"{usage['completion_tokens']} completion = "
+                    f"{usage['total_tokens']}"
+                )
+
+    def render_comparison_results(self, result: Dict[str, Any]):
+        """Render a side-by-side comparison of several models."""
+        if not result["success"]:
+            st.error(result["error"])
+            return
+
+        st.success("Comparison completed!")
+
+        # Reference Translation
+        st.subheader("Reference Translation (Endpoint)")
+        st.write(result["reference_translation"])
+        st.divider()
+
+        st.subheader("Model Comparison")
+        st.dataframe(
+            [
+                {
+                    "Model": MODEL_CONFIG.get(row["model"], row["model"]),
+                    "Similarity": (
+                        f"{row['similarity_score']:.2%}" if row["success"] else "N/A"
+                    ),
+                    "Category": row.get("category") or "N/A",
+                    "Latency (s)": f"{row['latency']:.2f}",
+                    "Error": row.get("error", ""),
+                }
+                for row in result["comparison"]
+            ],
+            use_container_width=True,
+        )
+
+        for row in result["comparison"]:
+            if not row["success"]:
+                continue
+            with st.expander(MODEL_CONFIG.get(row["model"], row["model"])):
+                st.markdown("**Translation:**")
+                st.write(row["openai_translation"])
+                st.markdown("**Detailed Analysis:**")
+                st.write(row["evaluation"].get("reason", "N/A"))
+
+        self.render_timings(result)
+
 
 def main():
-    ui = TranslationUI()
+    runner, service = get_runtime()
+    ui = TranslationUI(service)
 
     # Initialize session state for text input if not exists
     if "text_input" not in st.session_state:
         st.session_state.text_input = ""
+    # Segments of this session's last run, so edits only redo changed lines
+    if "edit_session" not in st.session_state:
+        st.session_state.edit_session = EditSession()
 
     (
         text_input,
@@ -198,6 +408,10 @@ def main():
         evaluate_translation,
         model_name,
         endpoint_url,
+        segment_aligned,
+        use_cache,
+        comparison_models,
+        single_pass,
     ) = ui.render_input_section()
 
     # Update session state
@@ -209,17 +423,47 @@ def main():
     if st.button("Translate", type="primary", disabled=translate_disabled):
         if text_input.strip():
             with st.spinner("Processing..."):
-                result = asyncio.run(
-                    ui.service.translate_text(
-                        text=text_input.strip(),
-                        source_language=source_language,
-                        target_language=target_language,
-                        evaluate=evaluate_translation,
-                        model_name=model_name,
-                        endpoint_url=endpoint_url,
-                    )
+                request = dict(
+                    text=text_input.strip(),
+                    source_language=source_language,
+                    target_language=target_language,
+                    evaluate=evaluate_translation,
+                    model_name=model_name,
+                    endpoint_url=endpoint_url,
+                    segment_aligned=segment_aligned,
+                    use_cache=use_cache,
+                    single_pass=single_pass,
+                    session=st.session_state.edit_session,
                 )
-                ui.render_translation_results(result)
+                if comparison_models:
+                    del request["evaluate"], request["model_name"], request["session"]
+                    result = runner.run(
+                        ui.service.compare_models(
+                            model_names=comparison_models, **request
+                        )
+                    )
+                    ui.render_comparison_results(result)
+                elif (
+                    evaluate_translation
+                    and model_name
+                    and not segment_aligned
+                    and not single_pass
+                ):
+                    # Stream the LLM translation; the rest lands in `result`
+                    result: Dict[str, Any] = {}
+
+                    def candidate_stream() -> Iterator[str]:
+                        events = ui.service.stream_translate_text(**request)
+                        for event in runner.iterate(events):
+                            if event["type"] == "delta":
+                                yield event["text"]
+                            else:
+                                result.update(event["result"])
+
+                    ui.render_translation_results(result, candidate_stream())
+                else:
+                    result = runner.run(ui.service.translate_text(**request))
+                    ui.render_translation_results(result)
 
 
 if __name__ == "__main__":
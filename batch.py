@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO
+
+from config import BATCH_CONFIG
+from config import MODEL_CONFIG
+
+from services import TranslationService
+
+# Accepted column / key names for each corpus field
+FIELD_ALIASES = {
+    "text": ("text", "source_text"),
+    "source_language": ("source_language", "source_lang", "source"),
+    "target_language": ("target_language", "target_lang", "target"),
+    "reference_translation": ("reference_translation", "reference"),
+}
+
+
+def _pick(row: Dict[str, Any], field: str) -> Optional[Any]:
+    """Return the first non-empty value among a field's aliases."""
+    for key in FIELD_ALIASES[field]:
+        value = row.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def iter_corpus(
+    path: str,
+    default_source: Optional[str] = None,
+    default_target: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read corpus records from a JSONL or CSV file.
+
+    Args:
+        path: Corpus file; ".csv" is read as CSV, anything else as JSONL
+        default_source: Source language for records that do not set one
+        default_target: Target language for records that do not set one
+
+    Yields:
+        Records with "id", "text", "source_language", "target_language" and
+        an optional "reference_translation". A row that is not valid JSON,
+        has no text or no language pair yields {"id", "error"} instead, so
+        one bad row does not stop the run.
+    """
+    with open(path, newline="", encoding="utf-8") as corpus:
+        if path.lower().endswith(".csv"):
+            rows: Iterator[Any] = csv.DictReader(corpus)
+        else:
+            rows = (line for line in corpus if line.strip())
+
+        for index, row in enumerate(rows):
+            if isinstance(row, str):
+                try:
+                    row = json.loads(row)
+                except json.JSONDecodeError as e:
+                    yield {"id": str(index), "error": f"Invalid JSON: {e}"}
+                    continue
+                if not isinstance(row, dict):
+                    yield {"id": str(index), "error": "Record is not a JSON object"}
+                    continue
+
+            record = {
+                "id": str(row.get("id", index)),
+                "text": _pick(row, "text"),
+                "source_language": _pick(row, "source_language") or default_source,
+                "target_language": _pick(row, "target_language") or default_target,
+                "reference_translation": _pick(row, "reference_translation"),
+            }
+            if not record["text"]:
+                yield {"id": record["id"], "error": "Record has no text"}
+            elif not record["source_language"] or not record["target_language"]:
+                yield {"id": record["id"], "error": "Record has no language pair"}
+            else:
+                yield record
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """
+    Read the ids of successfully finished records from a previous run.
+
+    The output file doubles as the checkpoint: a record counts as done once
+    a successful result line for it has been written. Failed records and a
+    torn final line from an interrupted run are retried.
+    """
+    completed: Set[str] = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding="utf-8") as output:
+        for line in output:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("success"):
+                completed.add(str(row["id"]))
+    return completed
+
+
+def _open_output(output_path: str) -> TextIO:
+    """Open the output for appending, sealing any torn final line first."""
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            needs_newline = existing.read(1) != b"\n"
+
+    output = open(output_path, "a", encoding="utf-8")
+    if needs_newline:
+        output.write("\n")
+    return output
+
+
+async def run_batch(
+    service: TranslationService,
+    records: Iterator[Dict[str, Any]],
+    output_path: str,
+    concurrency: int = BATCH_CONFIG["concurrency"],
+    evaluate: bool = False,
+    model_name: Optional[str] = None,
+    endpoint_url: Optional[str] = None,
+    resume: bool = True,
+    segment_aligned: bool = False,
+    use_cache: bool = True,
+    single_pass: bool = False,
+) -> Dict[str, int]:
+    """
+    Evaluate corpus records with bounded concurrency, streaming results.
+
+    Each result is appended to output_path as one JSON line as soon as it
+    completes, so memory stays flat regardless of corpus size. Only a small
+    bounded queue of pending records is held at any time.
+
+    Args:
+        service: Service used for every record
+        records: Corpus records, e.g. from iter_corpus
+        output_path: JSONL file for results; also the resume checkpoint
+        concurrency: Maximum number of records in flight
+        evaluate: Whether to run the LLM translation and evaluation
+        model_name: Model to use for evaluation
+        endpoint_url: Optional custom endpoint URL for translation
+        resume: Skip records already finished in output_path
+        segment_aligned: Score each line of a record separately
+        use_cache: Serve repeated LLM requests from the response cache
+        single_pass: Translate and evaluate with one LLM request per record
+
+    Returns:
+        Counters for processed, failed and skipped records.
+    """
+    completed = load_completed_ids(output_path) if resume else set()
+    stats = {"processed": 0, "failed": 0, "skipped": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    started = time.perf_counter()
+
+    if resume:
+        output = _open_output(output_path)
+    else:
+        output = open(output_path, "w", encoding="utf-8")
+
+    async def worker() -> None:
+        while True:
+            record = await queue.get()
+            if record is None:
+                return
+            if "error" in record:
+                # Invalid corpus rows are reported like failed records
+                result = {"success": False, "error": record["error"]}
+            else:
+                result = await service.translate_text(
+                    text=record["text"],
+                    source_language=record["source_language"],
+                    target_language=record["target_language"],
+                    evaluate=evaluate,
+                    model_name=model_name,
+                    endpoint_url=endpoint_url,
+                    reference_translation=record["reference_translation"],
+                    segment_aligned=segment_aligned,
+                    use_cache=use_cache,
+                    single_pass=single_pass,
+                )
+            result.pop("raw_response", None)
+            # Writes happen on the event loop thread, so lines never interleave
+            output.write(
+                json.dumps({"id": record["id"], **result}, ensure_ascii=False)
+                + "\n"
+            )
+            output.flush()
+
+            stats["processed"] += 1
+            if not result["success"]:
+                stats["failed"] += 1
+            if stats["processed"] % BATCH_CONFIG["progress_every"] == 0:
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{stats['processed']} records in {elapsed:.1f}s "
+                    f"({stats['failed']} failed, {stats['skipped']} skipped)",
+                    file=sys.stderr,
+                )
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for record in records:
+            if record["id"] in completed:
+                stats["skipped"] += 1
+                continue
+            await queue.put(record)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        output.close()
+
+    return stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Headless batch translation evaluation over a corpus file."
+    )
+    parser.add_argument("corpus", help="Input corpus (.jsonl or .csv)")
+    parser.add_argument("output", help="Output JSONL file (also the checkpoint)")
+    parser.add_argument("--source-language", help="Default source language code")
+    parser.add_argument("--target-language", help="Default target language code")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONFIG["concurrency"],
+        help="Maximum number of records in flight",
+    )
+    parser.add_argument(
+        "--model",
+        choices=list(MODEL_CONFIG.keys()),
+        help="Evaluate with this LLM; omit to fetch reference translations only",
+    )
+    parser.add_argument("--endpoint-url", help="Custom translation endpoint URL")
+    parser.add_argument(
+        "--segment-aligned",
+        action="store_true",
+        help="Translate and score each line separately",
+    )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="Translate and evaluate with one LLM request per record",
+    )
+    parser.add_argument(
+        "--pack-evaluations",
+        action="store_true",
+        help="Judge short records together in multi-segment LLM requests",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the LLM response cache",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Overwrite the output instead of resuming from it",
+    )
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, int]:
+    records = iter_corpus(args.corpus, args.source_language, args.target_language)
+    async with TranslationService(packed_evaluation=args.pack_evaluations) as service:
+        return await run_batch(
+            service,
+            records,
+            args.output,
+            concurrency=args.concurrency,
+            evaluate=args.model is not None,
+            model_name=args.model,
+            endpoint_url=args.endpoint_url,
+            resume=not args.no_resume,
+            segment_aligned=args.segment_aligned,
+            use_cache=not args.no_cache,
+            single_pass=args.single_pass,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    stats = asyncio.run(_main(parse_args(argv)))
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from config import MODEL_CONFIG
+from config import RATE_LIMIT_CONFIG
+import numpy as np
+
+from benchmarks.mock_server import MockFragmaServer
+from services import TranslationService
+
+# Rate limits high enough that only the mock server's latency is measured
+UNLIMITED_RATE_LIMIT_CONFIG = {
+    "default": {
+        **RATE_LIMIT_CONFIG["default"],
+        "requests_per_second": 1e6,
+        "burst": 1_000_000,
+        "initial_concurrency": 1024,
+        "max_concurrency": 1024,
+    },
+    "deployments": {},
+}
+
+
+def make_texts(count: int, lines: int) -> List[str]:
+    """Distinct multi-line inputs, so no request is served from a cache."""
+    return [
+        "\n".join(
+            f"Benchmark request {i}, line {j}: the quick brown fox jumps over "
+            "the lazy dog near the riverbank."
+            for j in range(lines)
+        )
+        for i in range(count)
+    ]
+
+
+def point_at(service: TranslationService, server: MockFragmaServer) -> None:
+    """Send every upstream call of the service to the mock server."""
+    service.translation_client.base_url = server.url
+    service.evaluation_client.base_url = f"{server.url}/openai/deployments"
+
+
+async def run_scenario(
+    server: MockFragmaServer,
+    concurrency: int,
+    lines: int,
+    requests: int,
+    evaluate: bool,
+    model_name: str,
+    segment_aligned: bool,
+    use_cache: bool,
+    rate_limited: bool,
+    pack_evaluations: bool = False,
+) -> Dict[str, Any]:
+    """
+    Drive translate_text with `requests` inputs at a fixed concurrency.
+
+    Returns:
+        Latency percentiles and throughput over successful requests, the
+        mean duration of each pipeline stage, and error counts from the
+        service, the rate limiters and the mock server.
+    """
+    server_before = dict(server.counters)
+    texts = make_texts(requests, lines)
+    latencies: List[float] = []
+    stage_totals: Dict[str, List[float]] = {}
+    failures: List[str] = []
+
+    # Mock translations must not reach the real caches, memories or history
+    with tempfile.TemporaryDirectory() as cache_directory:
+        service = TranslationService(
+            packed_evaluation=pack_evaluations,
+            results_store=False,
+            cache_directory=cache_directory,
+        )
+        async with service:
+            point_at(service, server)
+            if not rate_limited:
+                service.rate_limiters.config = UNLIMITED_RATE_LIMIT_CONFIG
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(text: str) -> None:
+                async with semaphore:
+                    started = time.perf_counter()
+                    result = await service.translate_text(
+                        text,
+                        "EN-US",
+                        "JA-JP",
+                        evaluate=evaluate,
+                        model_name=model_name,
+                        segment_aligned=segment_aligned,
+                        use_cache=use_cache,
+                    )
+                    elapsed = time.perf_counter() - started
+                if not result["success"]:
+                    failures.append(result["error"])
+                    return
+                latencies.append(elapsed)
+                for stage, seconds in result["timings"].items():
+                    stage_totals.setdefault(stage, []).append(seconds)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(text) for text in texts))
+            wall_time = time.perf_counter() - started
+            limiter_stats = service.rate_limit_stats()
+
+    percentiles = (
+        np.percentile(latencies, [50, 95, 99]) if latencies else [float("nan")] * 3
+    )
+    return {
+        "concurrency": concurrency,
+        "lines": lines,
+        "requests": requests,
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "wall_time": wall_time,
+        "throughput": len(latencies) / wall_time,
+        "p50": float(percentiles[0]),
+        "p95": float(percentiles[1]),
+        "p99": float(percentiles[2]),
+        "stages": {
+            stage: float(np.mean(seconds)) for stage, seconds in stage_totals.items()
+        },
+        "retries": sum(stats["retries"] for stats in limiter_stats.values()),
+        "server": {
+            key: server.counters[key] - server_before[key] for key in server.counters
+        },
+        "first_error": failures[0] if failures else None,
+    }
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """Render scenario results as a fixed-width table plus stage breakdowns."""
+    rows = [
+        f"{'conc':>5} {'lines':>5} {'ok':>6} {'fail':>5} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'retries':>7} {'429s':>5}"
+    ]
+    for r in results:
+        rows.append(
+            f"{r['concurrency']:>5} {r['lines']:>5} {r['succeeded']:>6} "
+            f"{r['failed']:>5} {r['throughput']:>8.1f} {r['p50'] * 1e3:>8.1f} "
+            f"{r['p95'] * 1e3:>8.1f} {r['p99'] * 1e3:>8.1f} {r['retries']:>7} "
+            f"{r['server']['throttled']:>5}"
+        )
+    rows.append("")
+    rows.append("Mean stage duration (ms):")
+    for r in results:
+        stages = ", ".join(
+            f"{stage} {seconds * 1e3:.1f}" for stage, seconds in r["stages"].items()
+        )
+        rows.append(f"  conc {r['concurrency']}, lines {r['lines']}: {stages}")
+    return "\n".join(rows)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark TranslationService against a local mock Fragma API."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=_int_list,
+        default=[1, 8, 32],
+        help="Comma-separated concurrency levels",
+    )
+    parser.add_argument(
+        "--lines",
+        type=_int_list,
+        default=[1, 10],
+        help="Comma-separated input sizes, in lines per request",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=100, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "--model",
+        choices=list(MODEL_CONFIG.keys()),
+        help="Also run the LLM translation and evaluation with this model",
+    )
+    parser.add_argument(
+        "--segment-aligned",
+        action="store_true",
+        help="Translate and score each line separately",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Keep the response cache and translation memories enabled",
+    )
+    parser.add_argument(
+        "--pack-evaluations",
+        action="store_true",
+        help="Judge concurrent evaluations in packed multi-segment requests",
+    )
+    parser.add_argument(
+        "--rate-limited",
+        action="store_true",
+        help="Apply RATE_LIMIT_CONFIG instead of effectively unlimited rates",
+    )
+    parser.add_argument("--translate-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failing with 500",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests throttled with 429",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    server = MockFragmaServer(
+        translate_latency=args.translate_latency,
+        chat_latency=args.chat_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    results = []
+    async with server:
+        for lines in args.lines:
+            for concurrency in args.concurrency:
+                result = await run_scenario(
+                    server,
+                    concurrency=concurrency,
+                    lines=lines,
+                    requests=args.requests,
+                    evaluate=args.model is not None,
+                    model_name=args.model,
+                    segment_aligned=args.segment_aligned,
+                    use_cache=args.use_cache,
+                    rate_limited=args.rate_limited,
+                    pack_evaluations=args.pack_evaluations,
+                )
+                print(
+                    f"concurrency {concurrency}, {lines} lines: "
+                    f"{result['throughput']:.1f} req/s, "
+                    f"p95 {result['p95'] * 1e3:.0f} ms",
+                    file=sys.stderr,
+                )
+                results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(_main(args))
+    print(format_report(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from config import EMBEDDING_BACKEND_CONFIG
+from config import EMBEDDING_MODEL_NAME
+import numpy as np
+
+# Benchmarked variants, as overrides of EMBEDDING_BACKEND_CONFIG
+VARIANTS = {
+    "sentence-transformers": {"backend": "sentence-transformers"},
+    "onnx": {"backend": "onnx", "quantize": False},
+    "onnx-int8": {"backend": "onnx", "quantize": True},
+}
+
+SUBJECTS = ["The hotel", "Our guest", "The front desk", "This room", "The shuttle"]
+VERBS = ["offers", "includes", "provides", "requires", "lists"]
+OBJECTS = [
+    "free breakfast for two adults",
+    "a late checkout until noon",
+    "airport pickup on request",
+    "a refundable deposit of 50 dollars",
+    "parking for one vehicle per night",
+]
+
+
+def make_pairs(count: int, seed: int = 0) -> List[List[str]]:
+    """
+    Sentence pairs spanning the score range: half are near-duplicates (one
+    word changed), half are unrelated.
+    """
+    rng = random.Random(seed)
+
+    def sentence() -> List[str]:
+        return [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS)]
+
+    pairs = []
+    for i in range(count):
+        left = sentence()
+        if i % 2 == 0:
+            right = list(left)
+            right[1] = rng.choice(VERBS)
+        else:
+            right = sentence()
+        pairs.append([" ".join(left) + f" (#{i}).", " ".join(right) + f" (#{i})."])
+    return pairs
+
+
+def run_worker(variant: str, pairs: List[List[str]], output: str) -> Dict[str, Any]:
+    """Measure one backend in this (fresh) process and save its embeddings."""
+    from utils.embedding_backends import create_backend
+
+    config = {**EMBEDDING_BACKEND_CONFIG, **VARIANTS[variant]}
+    texts = [text for pair in pairs for text in pair]
+
+    started = time.perf_counter()
+    backend = create_backend(EMBEDDING_MODEL_NAME, config)
+    backend.encode(texts[:8])
+    startup = time.perf_counter() - started
+
+    single = []
+    for text in texts[:50]:
+        started = time.perf_counter()
+        backend.encode([text])
+        single.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    embeddings = np.asarray(backend.encode(texts), dtype=np.float32)
+    batch_seconds = time.perf_counter() - started
+    np.save(output, embeddings)
+
+    return {
+        "variant": variant,
+        "startup_seconds": startup,
+        "single_ms_p50": float(np.median(single)) * 1e3,
+        "throughput": len(texts) / batch_seconds,
+        # ru_maxrss is reported in KiB on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def measure(variant: str, count: int, directory: str) -> Dict[str, Any]:
+    """Run one variant in a subprocess, so startup and memory are its own."""
+    output = os.path.join(directory, f"{variant}.npy")
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.embedding_benchmark",
+            "--worker",
+            variant,
+            "--pairs",
+            str(count),
+            "--embeddings",
+            output,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"variant": variant, "error": completed.stderr.strip().splitlines()[-1]}
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["embeddings"] = np.load(output)
+    return result
+
+
+def parity(baseline: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Compare pair cosine scores and per-text vector agreement with the baseline."""
+    scores = [
+        np.einsum("ij,ij->i", embeddings[0::2], embeddings[1::2])
+        for embeddings in (baseline, candidate)
+    ]
+    differences = np.abs(scores[0] - scores[1])
+    agreement = np.einsum("ij,ij->i", baseline, candidate)
+    return {
+        "max_score_diff": float(differences.max()),
+        "mean_score_diff": float(differences.mean()),
+        "min_vector_cosine": float(agreement.min()),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare embedding backends: startup time, latency, throughput, "
+            "peak memory and cosine-score parity with the first backend."
+        )
+    )
+    parser.add_argument(
+        "--backends",
+        default=",".join(VARIANTS),
+        help=f"Comma-separated variants out of {', '.join(VARIANTS)}",
+    )
+    parser.add_argument("--pairs", type=int, default=1000, help="Sentence pairs")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.02,
+        help="Largest accepted cosine score difference from the baseline",
+    )
+    parser.add_argument("--worker", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    pairs = make_pairs(args.pairs)
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, pairs, args.embeddings)))
+        return
+
+    variants = [variant for variant in args.backends.split(",") if variant]
+    with tempfile.TemporaryDirectory() as directory:
+        results = [measure(variant, args.pairs, directory) for variant in variants]
+
+    print(
+        f"{'backend':<22} {'startup s':>9} {'1 text ms':>9} {'texts/s':>9} "
+        f"{'peak MB':>8} {'max diff':>9} {'mean diff':>9}"
+    )
+    baseline = next((r for r in results if "embeddings" in r), None)
+    failed = False
+    for result in results:
+        if "error" in result:
+            print(f"{result['variant']:<22} failed: {result['error']}")
+            failed = True
+            continue
+        agreement = parity(baseline["embeddings"], result["embeddings"])
+        failed |= agreement["max_score_diff"] > args.tolerance
+        print(
+            f"{result['variant']:<22} {result['startup_seconds']:>9.2f} "
+            f"{result['single_ms_p50']:>9.2f} {result['throughput']:>9.0f} "
+            f"{result['max_rss_mb']:>8.0f} {agreement['max_score_diff']:>9.4f} "
+            f"{agreement['mean_score_diff']:>9.4f}"
+        )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
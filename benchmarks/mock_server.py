@@ -0,0 +1,280 @@
+import asyncio
+import json
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+CHAT_PATH = re.compile(r"^/openai/deployments/(?P<model>[^/]+)/chat/completions$")
+
+REASONS = {
+    200: "OK",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class MockFragmaServer:
+    """
+    Local stand-in for the Fragma API, for offline benchmarks.
+
+    Serves `/pre/translate` and `/openai/deployments/{model}/chat/completions`
+    over plain HTTP/1.1 with keep-alive, using only asyncio streams. Every
+    request sleeps for a base latency plus a per-line (endpoint) or per-token
+    (chat) cost, with uniform jitter. A share of requests fails with a 500 or
+    is throttled with a 429 and a Retry-After header.
+
+    Translations are deterministic ("[TARGET] source"), so results are
+    stable across runs; the chat completions answer every prompt shape the
+    OpenAIClient sends, including streamed translations.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        translate_latency: float = 0.05,
+        translate_line_latency: float = 0.002,
+        chat_latency: float = 0.3,
+        chat_token_latency: float = 0.005,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.translate_latency = translate_latency
+        self.translate_line_latency = translate_line_latency
+        self.chat_latency = chat_latency
+        self.chat_token_latency = chat_token_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.counters = {"requests": 0, "errors": 0, "throttled": 0}
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "MockFragmaServer":
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "MockFragmaServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle requests on one keep-alive connection until it closes."""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    return
+                path, body = request
+                await self._dispatch(path, body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        _, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b"{}"
+        return path, json.loads(body)
+
+    def _latency(self, base: float, per_unit: float, units: int) -> float:
+        spread = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        return (base + per_unit * units) * spread
+
+    async def _dispatch(
+        self, path: str, body: Dict[str, Any], writer: asyncio.StreamWriter
+    ) -> None:
+        self.counters["requests"] += 1
+        chat = CHAT_PATH.match(path)
+        if chat is None and path != "/pre/translate":
+            await self._respond(writer, 404, {"error": "not found"})
+            return
+
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            self.counters["throttled"] += 1
+            await self._respond(
+                writer,
+                429,
+                {"error": "rate limited"},
+                {"Retry-After": f"{self.retry_after:g}"},
+            )
+            return
+        if roll < self.throttle_rate + self.error_rate:
+            self.counters["errors"] += 1
+            await asyncio.sleep(self._latency(self.chat_latency / 10, 0, 0))
+            await self._respond(writer, 500, {"error": "injected failure"})
+            return
+
+        if chat is None:
+            texts = body.get("text", [])
+            await asyncio.sleep(
+                self._latency(
+                    self.translate_latency, self.translate_line_latency, len(texts)
+                )
+            )
+            target = body.get("target_lang", "")
+            await self._respond(
+                writer,
+                200,
+                {"translations": [{"text": f"[{target}] {text}"} for text in texts]},
+            )
+            return
+
+        content, prompt_tokens = self._chat_content(body)
+        completion_tokens = len(content.split())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            await self._stream_chat(writer, content, usage if include_usage else None)
+            return
+        await asyncio.sleep(
+            self._latency(self.chat_latency, self.chat_token_latency, completion_tokens)
+        )
+        await self._respond(
+            writer,
+            200,
+            {
+                "model": chat.group("model"),
+                "choices": [
+                    {"message": {"role": "assistant", "content": content}}
+                ],
+                "usage": usage,
+            },
+        )
+
+    @staticmethod
+    def _chat_content(body: Dict[str, Any]) -> Tuple[str, int]:
+        """Answer the prompt shapes sent by OpenAIClient."""
+        prompt = body["messages"][-1]["content"]
+        prompt_tokens = sum(len(m["content"].split()) for m in body["messages"])
+        source = MockFragmaServer._section(prompt, "SOURCE TEXT")
+
+        if "SOURCE SEGMENTS" in prompt:
+            segments = json.loads(MockFragmaServer._section(prompt, "SOURCE SEGMENTS"))
+            content = json.dumps(
+                {"translations": [f"[LLM] {s['text']}" for s in segments]},
+                ensure_ascii=False,
+            )
+        elif '"translation":' in prompt:
+            content = json.dumps(
+                {
+                    "translation": f"[LLM] {source}",
+                    "category": "good",
+                    "reason": "Mock self-evaluation.",
+                },
+                ensure_ascii=False,
+            )
+        elif "SEGMENTS:\n" in prompt:
+            # Packed evaluation: one verdict per segment id
+            packed = prompt.split("SEGMENTS:\n", 1)[1].split("\n\n", 1)[0]
+            content = json.dumps(
+                {
+                    "evaluations": [
+                        {"id": segment["id"], "category": "good", "reason": "Mock."}
+                        for segment in json.loads(packed)
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        elif body.get("response_format"):
+            content = json.dumps(
+                {"category": "good", "reason": "Mock evaluation."}, ensure_ascii=False
+            )
+        else:
+            content = f"[LLM] {source}"
+        return content, prompt_tokens
+
+    @staticmethod
+    def _section(prompt: str, heading: str) -> str:
+        """Text between "HEADING (...):" and the next blank line."""
+        match = re.search(rf"{heading} \([^)]*\):\n(.*?)(?:\n\n|$)", prompt, re.S)
+        return match.group(1) if match else ""
+
+    async def _stream_chat(
+        self,
+        writer: asyncio.StreamWriter,
+        content: str,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Send the completion as server-sent events, one word per chunk, then
+        a usage chunk if one is given.
+        """
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        await asyncio.sleep(self._latency(self.chat_latency, 0, 0))
+        words: List[str] = re.findall(r"\S+\s*", content)
+        for word in words:
+            chunk = {"choices": [{"delta": {"content": word}}]}
+            self._write_chunk(writer, f"data: {json.dumps(chunk)}\n\n".encode())
+            await writer.drain()
+            await asyncio.sleep(self._latency(0, self.chat_token_latency, 1))
+        if usage is not None:
+            chunk = {"choices": [], "usage": usage}
+            self._write_chunk(writer, f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
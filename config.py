@@ -1,5 +1,25 @@
+import os
+import sys
 from typing import List
-import streamlit as st
+
+
+def _api_key() -> str:
+    """
+    Read the Fragma API key from the API_KEY environment variable.
+
+    Under Streamlit, st.secrets is the fallback. Headless entry points
+    (server.py, batch.py, benchmarks) never import Streamlit.
+    """
+    api_key = os.environ.get("API_KEY")
+    if api_key or "streamlit" not in sys.modules:
+        return api_key or ""
+    import streamlit as st
+
+    try:
+        return st.secrets["API_KEY"]
+    except (FileNotFoundError, KeyError):
+        return ""
+
 
 # Available languages for translation
 AVAILABLE_LANGUAGES: List[str] = [
@@ -48,17 +68,177 @@ AVAILABLE_MODELS = list(MODEL_CONFIG.keys())
 # Display names for UI
 MODEL_DISPLAY_NAMES = list(MODEL_CONFIG.values())
 
+API_KEY = _api_key()
+
 # Translation API Configuration
 TRANSLATION_API_CONFIG = {
     "base_url": "https://fragma-api.yanolja.com",
-    "api_key": st.secrets["API_KEY"],
+    "api_key": API_KEY,
 }
 
 # OpenAI API Configuration
 OPENAI_API_CONFIG = {
     "base_url": "https://fragma-api.yanolja.com/openai/deployments",
-    "api_key": st.secrets["API_KEY"],
+    "api_key": API_KEY,
 }
 
 # HTTP Client Configuration
 HTTP_TIMEOUT = 60.0
+
+# Shared connection pool owned by TranslationService
+HTTP_POOL_CONFIG = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "http2": False,  # requires the optional `h2` package
+}
+
+# Headless batch runner (batch.py)
+BATCH_CONFIG = {
+    "concurrency": 8,
+    "progress_every": 100,  # log progress every N finished records
+}
+
+# Sentence embedding model used for cosine similarity
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# How the embedding model runs: "sentence-transformers" (PyTorch) or "onnx"
+# (ONNX Runtime, no torch; needs the optional onnxruntime package)
+EMBEDDING_BACKEND_CONFIG = {
+    "backend": "sentence-transformers",
+    # ONNX only: int8 dynamic quantization of the exported weights
+    "quantize": False,
+    # ONNX only: token limit (the model's own is 256) and intra-op threads
+    "max_length": 256,
+    "threads": None,
+    "cache_dir": ".cache/onnx",
+}
+
+# Embedding cache: in-memory LRU plus optional on-disk store (None disables it)
+EMBEDDING_CACHE_CONFIG = {
+    "max_entries": 10000,
+    "directory": ".cache/embeddings",
+}
+
+# Persistent cache for LLM translation/evaluation responses (path None disables it)
+RESPONSE_CACHE_CONFIG = {
+    "path": ".cache/responses.sqlite3",
+    "ttl_seconds": 7 * 24 * 3600,
+    "max_entries": 100000,
+}
+
+# Retries for throttled (429/503) and transient upstream failures
+RETRY_CONFIG = {
+    "max_retries": 5,
+    "base_delay": 0.5,  # seconds; doubled per attempt, with full jitter
+    "max_delay": 30.0,
+    "retry_statuses": (429, 500, 502, 503, 504),
+}
+
+# Token bucket + adaptive concurrency per deployment. Keys are
+# "llm:<MODEL_CONFIG key>" and "translation:<endpoint URL>".
+RATE_LIMIT_CONFIG = {
+    "default": {
+        "requests_per_second": 10.0,
+        "burst": 20,
+        "initial_concurrency": 8,
+        "min_concurrency": 1,
+        "max_concurrency": 64,
+    },
+    "deployments": {},
+}
+
+# Seconds each model may take in a multi-model comparison
+MODEL_FANOUT_TIMEOUT = 120.0
+
+# Large inputs are split into chunks sent to the translation endpoint concurrently
+TRANSLATION_CHUNK_CONFIG = {
+    "max_lines": 50,
+    "max_bytes": 16 * 1024,
+    "concurrency": 4,
+    "retries": 2,  # extra rounds for chunks that still fail after HTTP retries
+}
+
+# Exact-match translation memory for endpoint and LLM segments (path None disables it)
+TRANSLATION_MEMORY_CONFIG = {
+    "path": ".cache/translation_memory.sqlite3",
+}
+
+# Fuzzy translation memory: vector index of past evaluations keyed by source
+# embedding, surfacing near-duplicate sources (directory None disables it)
+# Sources longer than the embedding model's token limit are skipped, since
+# their embedding covers only the start of the text
+FUZZY_MEMORY_CONFIG = {
+    "directory": ".cache/fuzzy_memory",
+    "top_k": 3,
+    "threshold": 0.85,
+    # Reuse the category of a same-model match at or above this score instead
+    # of calling the LLM judge (None always evaluates)
+    "reuse_threshold": None,
+    # Partition the index into IVF lists once it holds this many rows
+    "ivf_min_rows": 50000,
+    "ivf_probes": 8,
+}
+
+# Tiered evaluation gate: cheap local metrics decide whether the LLM judge is
+# needed. A candidate whose every segment clears the chrF and length ratio
+# thresholds (tier 1) and the cosine threshold (tier 2) gets `category`
+# without a judge call.
+EVALUATION_GATE_CONFIG = {
+    "enabled": True,
+    "min_chrf": 0.9,
+    "length_ratio": (0.8, 1.25),
+    "min_similarity": 0.95,
+    "category": "excellent",
+}
+
+# Packed evaluation: concurrent LLM judge calls for short segments are grouped
+# into one multi-segment request (batch.py --pack-evaluations turns it on)
+PACKED_EVALUATION_CONFIG = {
+    "enabled": False,
+    # Estimated tokens of segment text per request, and segments per request
+    "max_packet_tokens": 6000,
+    "max_segments": 40,
+    # Longer segments are always evaluated on their own
+    "max_segment_tokens": 400,
+    # Seconds a segment may wait for others to fill its packet
+    "max_wait": 0.05,
+    # Packed attempts for a segment whose entry is missing or malformed,
+    # before it falls back to a request of its own
+    "max_rounds": 3,
+}
+
+# Every evaluation is kept here for the History page (path None disables it).
+# Rows are written by a background thread in batches of up to batch_size,
+# at most flush_interval seconds after they are recorded.
+RESULTS_STORE_CONFIG = {
+    "path": ".cache/results.sqlite3",
+    "batch_size": 500,
+    "flush_interval": 1.0,
+}
+
+# Metrics: stage timings, upstream HTTP statuses, retries and LLM token usage
+METRICS_CONFIG = {
+    "enabled": True,
+    # Serve GET /metrics in Prometheus text format on this port (None disables it)
+    "port": None,
+    # Also emit OpenTelemetry spans (requires the optional opentelemetry-api)
+    "opentelemetry": False,
+}
+
+# Headless ASGI server (server.py)
+SERVER_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    # Requests processed at once; beyond this they wait in the queue
+    "max_concurrency": 32,
+    # Requests allowed to wait; beyond this the server answers 503
+    "max_queue": 64,
+    # Retry-After seconds suggested with a 503
+    "retry_after": 1,
+    # Largest accepted request body in bytes
+    "max_body_bytes": 10 * 1024 * 1024,
+    # Most records accepted by one /batch request; larger corpora go through
+    # batch.py or several requests
+    "max_batch_records": 1000,
+}
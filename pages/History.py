@@ -0,0 +1,121 @@
+from datetime import date
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from config import MODEL_CONFIG
+from config import RESULTS_STORE_CONFIG
+import streamlit as st
+
+from api_clients.evaluation_client import EVALUATION_CATEGORIES
+from utils.results_store import ResultsStore
+
+
+@st.cache_resource
+def get_store() -> Optional[ResultsStore]:
+    """Return a process-wide handle on the results store, used read-only here."""
+    if not RESULTS_STORE_CONFIG["path"]:
+        return None
+    return ResultsStore(**RESULTS_STORE_CONFIG)
+
+
+def series_label(row: Dict[str, Any]) -> str:
+    """Chart series name for a model or language pair group."""
+    if "model" in row:
+        return MODEL_CONFIG.get(row["model"], row["model"])
+    return f"{row['source_language']} → {row['target_language']}"
+
+
+def main():
+    st.title("Evaluation History")
+
+    store = get_store()
+    if store is None:
+        st.info("The results store is disabled (RESULTS_STORE_CONFIG['path']).")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        period = st.date_input(
+            "Period", value=(date.today() - timedelta(days=30), date.today())
+        )
+    with col2:
+        bucket = st.selectbox("Time bucket", ["day", "week", "month"])
+    with col3:
+        dimension = st.selectbox("Compare", ["Model", "Language pair"])
+    models = st.multiselect(
+        "Models",
+        store.models(),
+        format_func=lambda model: MODEL_CONFIG.get(model, model),
+        help="Leave empty to include every model.",
+    )
+
+    # The range picker holds a single date while the end date is chosen
+    since, until = (tuple(period) * 2)[:2] if period else (None, None)
+    if dimension == "Model":
+        group_by = ("model",)
+    else:
+        group_by = ("source_language", "target_language")
+    query = dict(
+        group_by=group_by,
+        since=since.isoformat() if since else None,
+        until=until.isoformat() if until else None,
+        models=models,
+    )
+    totals = store.aggregate(bucket="all", **query)
+    if not totals:
+        st.info("No evaluations recorded in this period.")
+        return
+    over_time = store.aggregate(bucket=bucket, **query)
+
+    st.metric("Evaluations", sum(row["count"] for row in totals))
+
+    st.subheader("Mean similarity over time")
+    st.line_chart(
+        [
+            {
+                "Period": row["bucket"],
+                dimension: series_label(row),
+                "Mean similarity": row["mean_similarity"],
+            }
+            for row in over_time
+        ],
+        x="Period",
+        y="Mean similarity",
+        color=dimension,
+    )
+
+    st.subheader("Category distribution")
+    st.bar_chart(
+        [
+            {
+                dimension: series_label(row),
+                **{category: row[category] for category in EVALUATION_CATEGORIES},
+            }
+            for row in totals
+        ],
+        x=dimension,
+        y=EVALUATION_CATEGORIES,
+    )
+
+    st.dataframe(
+        [
+            {
+                dimension: series_label(row),
+                "Evaluations": row["count"],
+                "Mean similarity": (
+                    f"{row['mean_similarity']:.2%}"
+                    if row["mean_similarity"] is not None
+                    else "N/A"
+                ),
+                **{
+                    category.title(): f"{row[category] / row['count']:.0%}"
+                    for category in EVALUATION_CATEGORIES
+                },
+            }
+            for row in totals
+        ],
+        use_container_width=True,
+    )
+
+
+main()
@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import BATCH_CONFIG
+from config import MODEL_CONFIG
+from config import SERVER_CONFIG
+
+from services import TranslationService
+from utils.metrics import metrics
+from utils.similarity import compute_similarity_batch
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# translate_text arguments accepted from request bodies
+TRANSLATE_FIELDS = (
+    "text",
+    "source_language",
+    "target_language",
+    "evaluate",
+    "model_name",
+    "endpoint_url",
+    "reference_translation",
+    "segment_aligned",
+    "use_cache",
+    "single_pass",
+)
+
+
+class HTTPError(Exception):
+    """An error answered with its status code and a JSON {"error": ...} body."""
+
+    def __init__(
+        self, status: int, message: str, headers: Optional[Dict[str, str]] = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class AdmissionControl:
+    """
+    Bounded request queue in front of the service.
+
+    Up to max_concurrency requests run at once and up to max_queue more wait
+    for a slot; anything beyond that is rejected immediately with a 503, so
+    a saturated server sheds load instead of piling up latency.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> None:
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            metrics.inc("server_rejected_total")
+            raise HTTPError(
+                503,
+                "Server is saturated, retry later",
+                {"Retry-After": f"{self.retry_after:g}"},
+            )
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.active -= 1
+        self._slots.release()
+
+
+class TranslationServer:
+    """
+    ASGI application exposing TranslationService over JSON.
+
+    Routes:
+        POST /translate   translate_text for one text
+        POST /batch       translate_text for a list of records
+        POST /similarity  cosine similarity for text pairs
+        GET  /health      liveness plus queue and rate limiter state
+        GET  /metrics     Prometheus text format
+
+    The service (and its connection pool) is created on lifespan startup,
+    so every request shares the server's single event loop and pool. POST
+    routes go through AdmissionControl.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**SERVER_CONFIG, **(config or {})}
+        self.service: Optional[TranslationService] = None
+        self.admission: Optional[AdmissionControl] = None
+        self.routes: Dict[Tuple[str, str], Callable[..., Awaitable[Any]]] = {
+            ("POST", "/translate"): self.translate,
+            ("POST", "/batch"): self.batch,
+            ("POST", "/similarity"): self.similarity,
+            ("GET", "/health"): self.health,
+        }
+
+    async def startup(self) -> None:
+        self.service = TranslationService()
+        self.admission = AdmissionControl(
+            self.config["max_concurrency"],
+            self.config["max_queue"],
+            self.config["retry_after"],
+        )
+
+    async def shutdown(self) -> None:
+        if self.service is not None:
+            await self.service.aclose()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method, path = scope["method"], scope["path"]
+        try:
+            if self.service is None:
+                # Servers without lifespan support
+                await self.startup()
+            if (method, path) == ("GET", "/metrics"):
+                await self._send(
+                    send,
+                    200,
+                    metrics.render_prometheus().encode("utf-8"),
+                    "text/plain; version=0.0.4; charset=utf-8",
+                )
+                return
+
+            handler = self.routes.get((method, path))
+            if handler is None:
+                allowed = [m for m, p in self.routes if p == path]
+                if allowed:
+                    raise HTTPError(405, f"Use {', '.join(allowed)} for {path}")
+                raise HTTPError(404, f"No route for {path}")
+
+            if method == "GET":
+                result = await handler()
+            else:
+                body = await self._read_json(receive)
+                async with self.admission:
+                    result = await handler(body)
+            await self._send_json(send, 200, result)
+
+        except HTTPError as e:
+            await self._send_json(send, e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            await self._send_json(send, 500, {"error": f"Unexpected error: {e}"})
+
+    async def _read_json(self, receive: Receive) -> Dict[str, Any]:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.config["max_body_bytes"]:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return body
+
+    async def _send_json(
+        self,
+        send: Send,
+        status: int,
+        payload: Any,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send(send, status, body, "application/json", headers)
+
+    @staticmethod
+    async def _send(
+        send: Send,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        raw_headers = [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ]
+        raw_headers += [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ]
+        await send(
+            {"type": "http.response.start", "status": status, "headers": raw_headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _translate_arguments(
+        body: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Validate a request object into translate_text keyword arguments."""
+        arguments = {**(defaults or {})}
+        arguments.update(
+            {field: body[field] for field in TRANSLATE_FIELDS if field in body}
+        )
+        for field in ("text", "source_language", "target_language"):
+            if not isinstance(arguments.get(field), str) or not arguments[field]:
+                raise HTTPError(400, f"'{field}' is required")
+        model_name = arguments.get("model_name")
+        if model_name is not None and model_name not in MODEL_CONFIG:
+            raise HTTPError(400, f"Unknown model '{model_name}'")
+        if arguments.get("evaluate") and not model_name:
+            raise HTTPError(400, "'model_name' is required to evaluate")
+        return arguments
+
+    @staticmethod
+    def _without_raw_response(result: Dict[str, Any]) -> Dict[str, Any]:
+        result.pop("raw_response", None)
+        return result
+
+    async def translate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self.service.translate_text(**self._translate_arguments(body))
+        return self._without_raw_response(result)
+
+    async def batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate {"records": [...]} with bounded concurrency.
+
+        At most max_batch_records records are accepted, and concurrency is
+        capped at the server's max_concurrency.
+
+        Top-level translate_text fields are defaults for every record, and
+        results come back in record order with each record's "id".
+        """
+        records = body.get("records")
+        if (
+            not isinstance(records, list)
+            or not records
+            or not all(isinstance(record, dict) for record in records)
+        ):
+            raise HTTPError(400, "'records' must be a non-empty list of objects")
+        if len(records) > self.config["max_batch_records"]:
+            raise HTTPError(
+                413, f"At most {self.config['max_batch_records']} records per batch"
+            )
+        concurrency = body.get("concurrency", BATCH_CONFIG["concurrency"])
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise HTTPError(400, "'concurrency' must be a positive integer")
+        # The whole batch holds one admission slot, so it may not fan out
+        # wider than the server admits requests
+        concurrency = min(concurrency, self.config["max_concurrency"])
+
+        defaults = {field: body[field] for field in TRANSLATE_FIELDS if field in body}
+        requests = [self._translate_arguments(record, defaults) for record in records]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, arguments: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.service.translate_text(**arguments)
+            return {
+                "id": records[index].get("id", index),
+                **self._without_raw_response(result),
+            }
+
+        results = await asyncio.gather(
+            *(run(index, arguments) for index, arguments in enumerate(requests))
+        )
+        return {
+            "results": results,
+            "failed": sum(1 for result in results if not result["success"]),
+        }
+
+    async def similarity(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Score {"pairs": [[text1, text2], ...]} or a single text1/text2."""
+        if "pairs" in body:
+            pairs = body["pairs"]
+        else:
+            pairs = [[body.get("text1"), body.get("text2")]]
+        if not isinstance(pairs, list) or not all(
+            isinstance(pair, list)
+            and len(pair) == 2
+            and all(isinstance(text, str) for text in pair)
+            for pair in pairs
+        ):
+            raise HTTPError(400, "'pairs' must be a list of [text1, text2] strings")
+        # Embedding is CPU-bound; keep it off the event loop
+        scores = await asyncio.to_thread(
+            compute_similarity_batch, [tuple(pair) for pair in pairs]
+        )
+        return {"scores": scores}
+
+    async def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "active": self.admission.active,
+            "queued": self.admission.waiting,
+            "rate_limits": self.service.rate_limit_stats(),
+        }
+
+
+app = TranslationServer()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve the translation evaluator as a JSON HTTP API."
+    )
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit(
+            "server.py needs an ASGI server: pip install uvicorn "
+            "(or run `server:app` under any other ASGI server)"
+        )
+    # One worker process: the whole server shares one loop and one pool
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,154 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
 from api_clients import APIError
+from api_clients import create_http_client
 from api_clients import OpenAIClient
+from api_clients import PackedEvaluator
+from api_clients import RateLimiterRegistry
+from api_clients import ResponseCache
+from api_clients import ResponseFormatError
 from api_clients import TranslationAPIClient
+from config import EVALUATION_GATE_CONFIG
+from config import FUZZY_MEMORY_CONFIG
+from config import METRICS_CONFIG
+from config import MODEL_FANOUT_TIMEOUT
+from config import PACKED_EVALUATION_CONFIG
+from config import RESPONSE_CACHE_CONFIG
+from config import RESULTS_STORE_CONFIG
+from config import TRANSLATION_MEMORY_CONFIG
+from utils.fuzzy_memory import FuzzyMemory
+from utils.edit_session import current_session
+from utils.edit_session import EditSession
+from utils.edit_session import use_session
+from utils.metrics import metrics
+from utils.metrics import start_metrics_server
+from utils.metrics import track_usage
+from utils.quality_gate import gate_decision
+from utils.quality_gate import lexical_tier
+from utils.results_store import ResultsStore
 from utils.similarity import compute_cosine_similarity
+from utils.similarity import compute_similarity_batch
+from utils.similarity import EMBEDDING_SPACE
+from utils.similarity import encode_texts
+from utils.similarity import fits_model
+from utils.translation_memory import TranslationMemory
+
+
+class _Flight:
+    """One in-flight translate_text call and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters", "session")
+
+    def __init__(
+        self,
+        task: "asyncio.Task[Dict[str, Any]]",
+        session: Optional[EditSession] = None,
+    ):
+        self.task = task
+        self.waiters = 0
+        # The leader's session, which the run updates
+        self.session = session
 
 
 class TranslationService:
 
-    def __init__(self):
-        self.translation_client = TranslationAPIClient()
-        self.evaluation_client = OpenAIClient()
+    def __init__(
+        self,
+        pool_config: Optional[Dict[str, Any]] = None,
+        packed_evaluation: Optional[bool] = None,
+        results_store: Optional[bool] = None,
+        cache_directory: Optional[str] = None,
+    ):
+        def store_path(path: Optional[str]) -> Optional[str]:
+            # cache_directory relocates the local stores, e.g. to a temporary
+            # directory for runs that must not touch the real ones
+            if path and cache_directory:
+                return os.path.join(cache_directory, os.path.basename(path))
+            return path
+
+        # One connection pool for every upstream call; the API clients borrow it
+        self.http_client = create_http_client(pool_config)
+        response_cache_path = store_path(RESPONSE_CACHE_CONFIG["path"])
+        self.response_cache = (
+            ResponseCache(**{**RESPONSE_CACHE_CONFIG, "path": response_cache_path})
+            if response_cache_path
+            else None
+        )
+        # Exact-match memory of past segment translations
+        translation_memory_path = store_path(TRANSLATION_MEMORY_CONFIG["path"])
+        self.translation_memory = (
+            TranslationMemory(translation_memory_path)
+            if translation_memory_path
+            else None
+        )
+        # Vector index of past evaluations for near-duplicate sources
+        fuzzy_memory_directory = store_path(FUZZY_MEMORY_CONFIG["directory"])
+        self.fuzzy_memory = (
+            FuzzyMemory(
+                os.path.join(fuzzy_memory_directory, EMBEDDING_SPACE),
+                ivf_min_rows=FUZZY_MEMORY_CONFIG["ivf_min_rows"],
+                ivf_probes=FUZZY_MEMORY_CONFIG["ivf_probes"],
+            )
+            if fuzzy_memory_directory
+            else None
+        )
+        # History of evaluations for quality tracking, written off the loop;
+        # the argument overrides whether RESULTS_STORE_CONFIG["path"] is used
+        if results_store is None:
+            results_store = bool(RESULTS_STORE_CONFIG["path"])
+        results_store_path = store_path(RESULTS_STORE_CONFIG["path"])
+        self.results_store = (
+            ResultsStore(**{**RESULTS_STORE_CONFIG, "path": results_store_path})
+            if results_store and results_store_path
+            else None
+        )
+        # Rate limits, retries and throttle counters per upstream deployment
+        self.rate_limiters = RateLimiterRegistry()
+        self.translation_client = TranslationAPIClient(
+            self.http_client, self.rate_limiters
+        )
+        self.evaluation_client = OpenAIClient(
+            self.http_client, self.response_cache, self.rate_limiters
+        )
+        # Groups concurrent judge calls into multi-segment requests; the
+        # argument overrides PACKED_EVALUATION_CONFIG["enabled"]
+        if packed_evaluation is None:
+            packed_evaluation = PACKED_EVALUATION_CONFIG["enabled"]
+        self.packed_evaluator = (
+            PackedEvaluator(self.evaluation_client) if packed_evaluation else None
+        )
+        if METRICS_CONFIG["enabled"] and METRICS_CONFIG["port"]:
+            start_metrics_server(METRICS_CONFIG["port"])
+        # Identical translate_text calls in flight, keyed by _flight_key
+        self._in_flight: Dict[str, _Flight] = {}
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool and the local stores."""
+        if self.packed_evaluator is not None:
+            self.packed_evaluator.close()
+        await self.http_client.aclose()
+        if self.response_cache is not None:
+            self.response_cache.close()
+        if self.translation_memory is not None:
+            self.translation_memory.close()
+        if self.results_store is not None:
+            # Waits for the writer thread to drain the queue
+            self.results_store.close()
+
+    def rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Request, throttle, retry and failure counters per deployment."""
+        return self.rate_limiters.stats()
+
+    async def __aenter__(self) -> "TranslationService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
 
     async def translate_text(
         self,
@@ -20,9 +158,22 @@ class TranslationService:
         evaluate: bool = False,
         model_name: Optional[str] = None,
         endpoint_url: Optional[str] = None,
+        reference_translation: Optional[str] = None,
+        segment_aligned: bool = False,
+        use_cache: bool = True,
+        on_candidate_delta: Optional[Callable[[str], None]] = None,
+        single_pass: bool = False,
+        session: Optional[EditSession] = None,
     ) -> Dict[str, Any]:
         """
         Translate text and optionally evaluate the translation.
+
+        Identical concurrent calls (same text, languages, model, endpoint and
+        options) share one in-flight run instead of repeating the upstream
+        calls; those that joined a run get "coalesced": True in the result.
+        The shared run is cancelled only once every caller has gone. A
+        caller's session does not split the run: the others' sessions are
+        brought up to it afterwards.
         Args:
             text: Text to translate
             source_language: Source language code
@@ -30,20 +181,190 @@ class TranslationService:
             evaluate: Whether to evaluate the translation
             model_name: Model to use for evaluation (required if evaluate is True)
             endpoint_url: Optional custom endpoint URL for translation
+            reference_translation: Known reference; skips the endpoint call
+            segment_aligned: Translate and score each input line separately
+            use_cache: Reuse the response cache and the translation memory
+            on_candidate_delta: Called with each chunk of the LLM translation
+                as it streams in (not used in segment-aligned mode)
+            single_pass: Translate and evaluate with one LLM request, falling
+                back to separate requests if the answer cannot be parsed
+            session: The caller's EditSession; lines unchanged since its
+                previous run reuse that run's reference translation and, in
+                segment-aligned mode, its LLM translation and score. Ignored
+                when use_cache is False
         Returns:
-            Dictionary containing translation and evaluation results.
+            Dictionary containing translation and evaluation results, plus
+            per-stage wall-clock timings in seconds under "timings", LLM token
+            counts under "usage", the translation memory hit rate under
+            "translation_memory", the evaluation gate's metrics and
+            decision under "evaluation_gate" and, with a session, the line
+            diff against its previous run under "incremental".
+        """
+        if not use_cache:
+            # Like the memories, the previous run is reused only with caching
+            session = None
+        key = self._flight_key(
+            text,
+            source_language,
+            target_language,
+            model_name,
+            endpoint_url,
+            evaluate,
+            reference_translation,
+            segment_aligned,
+            use_cache,
+            single_pass,
+        )
+        flight = self._in_flight.get(key)
+        joined = flight is not None
+        if flight is None:
+            flight = _Flight(
+                asyncio.ensure_future(
+                    self._translate_text(
+                        text,
+                        source_language,
+                        target_language,
+                        evaluate,
+                        model_name,
+                        endpoint_url,
+                        reference_translation,
+                        segment_aligned,
+                        use_cache,
+                        on_candidate_delta,
+                        single_pass,
+                        session,
+                    )
+                ),
+                session,
+            )
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget_flight(key, flight))
+        else:
+            metrics.inc("coalesced_requests_total")
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left waiting for the result
+                flight.task.cancel()
+                self._forget_flight(key, flight)
+
+        # Callers get their own copy, since some pop fields off the result
+        result = dict(result)
+        if joined:
+            result["coalesced"] = True
+            self._join_session(
+                result, flight.session, session, text, source_language, target_language
+            )
+            # A joined caller did not see the leader's stream; send it whole
+            if on_candidate_delta is not None and "openai_translation" in result:
+                on_candidate_delta(result["openai_translation"])
+        return result
+
+    @staticmethod
+    def _join_session(
+        result: Dict[str, Any],
+        leader: Optional[EditSession],
+        session: Optional[EditSession],
+        text: str,
+        source_language: str,
+        target_language: str,
+    ) -> None:
+        """
+        Bring a joined caller's session up to the shared run.
+
+        The run only updated the leader's session (if any); the caller's own
+        session diffs the text and takes over the run's segments and scores,
+        so its next edit is as incremental as the leader's.
         """
+        if session is leader:
+            return
+        result.pop("incremental", None)
+        if session is None or leader is None:
+            return
+        text_lines = [line.strip() for line in text.split("\n") if line.strip()]
+        result["incremental"] = session.diff(
+            source_language, target_language, text_lines
+        )
+        session.adopt(leader, source_language, target_language)
+
+    def _forget_flight(self, key: str, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    @staticmethod
+    def _flight_key(*request: Any) -> str:
+        """Hash of every translate_text argument that shapes the result."""
+        serialized = json.dumps(request, ensure_ascii=False)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def _translate_text(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        evaluate: bool,
+        model_name: Optional[str],
+        endpoint_url: Optional[str],
+        reference_translation: Optional[str],
+        segment_aligned: bool,
+        use_cache: bool,
+        on_candidate_delta: Optional[Callable[[str], None]],
+        single_pass: bool,
+        session: Optional[EditSession],
+    ) -> Dict[str, Any]:
+        """Run translate_text for one flight; see translate_text."""
+        timings: Dict[str, float] = {}
+        memory_stats: Dict[str, Dict[str, int]] = {}
+        usage = track_usage()
+        use_session(session)
+        started = time.perf_counter()
         try:
             # Split text into lines and clean
             text_lines = [line.strip() for line in text.split("\n") if line.strip()]
+            incremental = (
+                session.diff(source_language, target_language, text_lines)
+                if session is not None
+                else None
+            )
 
-            # Get reference translation from user-provided endpoint
-            translation_result = await self.translation_client.translate(
-                text_list=text_lines,
-                source_lang=source_language,
-                target_lang=target_language,
-                endpoint_url=endpoint_url,
+            # Stage 1: the endpoint (reference) and LLM (candidate) translations
+            # are independent, so request them concurrently
+            reference_task = asyncio.ensure_future(
+                self._reference_stage(
+                    text_lines,
+                    source_language,
+                    target_language,
+                    endpoint_url,
+                    reference_translation,
+                    timings,
+                    memory_stats,
+                    use_cache,
+                )
             )
+            try:
+                candidate = None
+                if evaluate and model_name:
+                    candidate = await self._candidate_chain(
+                        text,
+                        text_lines,
+                        source_language,
+                        target_language,
+                        model_name,
+                        reference_task,
+                        timings,
+                        memory_stats,
+                        segment_aligned=segment_aligned,
+                        use_cache=use_cache,
+                        on_candidate_delta=on_candidate_delta,
+                        single_pass=single_pass,
+                    )
+                translation_result = await reference_task
+            finally:
+                reference_task.cancel()
 
             # Extract reference translation
             reference_translation = self._extract_translated_text(translation_result)
@@ -53,32 +374,163 @@ class TranslationService:
                 "reference_translation": reference_translation,
                 "raw_response": translation_result,
             }
+            if candidate is not None:
+                result.update(candidate)
+            if memory_stats:
+                result["translation_memory"] = self._memory_summary(memory_stats)
+            if incremental is not None:
+                result["incremental"] = incremental
+            if usage["total_tokens"]:
+                result["usage"] = usage
 
-            # Get OpenAI translation and evaluate it against reference if evaluation is requested
-            if evaluate and model_name:
-                # Get OpenAI translation
-                openai_result = await self.evaluation_client.get_translation(
-                    text, source_language, target_language, model_name
+            timings["total"] = time.perf_counter() - started
+            result["timings"] = timings
+            if candidate is not None:
+                self._store_result(
+                    text,
+                    source_language,
+                    target_language,
+                    model_name,
+                    reference_translation,
+                    candidate,
+                    timings["total"],
+                    usage["total_tokens"],
                 )
-                result["openai_translation"] = openai_result["text"]
+            return result
 
-                # Compute cosine similarity between translations
-                similarity = compute_cosine_similarity(
-                    reference_translation, result["openai_translation"]
-                )
-                result["similarity_score"] = similarity
+        except APIError as e:
+            return {"success": False, "error": str(e)}
+        except Exception as e:
+            return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
-                # Evaluate OpenAI translation against reference translation
-                evaluation = await self.evaluation_client.evaluate_translation(
-                    text,
-                    result["openai_translation"],
+    async def compare_models(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        model_names: List[str],
+        endpoint_url: Optional[str] = None,
+        reference_translation: Optional[str] = None,
+        segment_aligned: bool = False,
+        use_cache: bool = True,
+        timeout: float = MODEL_FANOUT_TIMEOUT,
+        single_pass: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Translate text once with the endpoint and evaluate several models.
+
+        Each model's translate, similarity and evaluate chain runs
+        concurrently with the others and with the endpoint call, so the
+        comparison takes roughly as long as the slowest single model.
+        Args:
+            text: Text to translate
+            source_language: Source language code
+            target_language: Target language code
+            model_names: Models to compare
+            endpoint_url: Optional custom endpoint URL for translation
+            reference_translation: Known reference; skips the endpoint call
+            segment_aligned: Translate and score each input line separately
+            use_cache: Serve repeated LLM requests from the response cache
+            timeout: Seconds each model's chain may take before it is dropped
+            single_pass: Translate and evaluate with one request per model
+        Returns:
+            Dictionary with the reference translation and a "comparison" list
+            holding similarity, category, latency and token usage per model.
+        """
+        timings: Dict[str, float] = {}
+        reference_memory_stats: Dict[str, Dict[str, int]] = {}
+        started = time.perf_counter()
+        try:
+            text_lines = [line.strip() for line in text.split("\n") if line.strip()]
+            reference_task = asyncio.ensure_future(
+                self._reference_stage(
+                    text_lines,
                     source_language,
                     target_language,
-                    model_name,
-                    reference_translation=reference_translation,
+                    endpoint_url,
+                    reference_translation,
+                    timings,
+                    reference_memory_stats,
+                    use_cache,
                 )
-                result["evaluation"] = evaluation
+            )
 
+            async def run_model(model_name: str) -> Dict[str, Any]:
+                model_timings: Dict[str, float] = {}
+                model_memory_stats: Dict[str, Dict[str, int]] = {}
+                # Each model runs in its own task, so its usage is its own
+                model_usage = track_usage()
+                model_started = time.perf_counter()
+                row: Dict[str, Any] = {"model": model_name}
+                try:
+                    candidate = await asyncio.wait_for(
+                        self._candidate_chain(
+                            text,
+                            text_lines,
+                            source_language,
+                            target_language,
+                            model_name,
+                            reference_task,
+                            model_timings,
+                            model_memory_stats,
+                            segment_aligned=segment_aligned,
+                            use_cache=use_cache,
+                            single_pass=single_pass,
+                        ),
+                        timeout,
+                    )
+                    row.update(success=True, **candidate)
+                    row["category"] = candidate["evaluation"].get("category")
+                except asyncio.TimeoutError:
+                    row.update(
+                        success=False, error=f"Timed out after {timeout:g}s"
+                    )
+                except Exception as e:
+                    row.update(success=False, error=str(e))
+                row["latency"] = time.perf_counter() - model_started
+                row["timings"] = model_timings
+                row["usage"] = model_usage
+                if model_memory_stats:
+                    row["translation_memory"] = self._memory_summary(
+                        model_memory_stats
+                    )
+                return row
+
+            try:
+                comparison = await asyncio.gather(*map(run_model, model_names))
+                translation_result = await reference_task
+            finally:
+                reference_task.cancel()
+
+            timings["total"] = time.perf_counter() - started
+            reference_translation = self._extract_translated_text(translation_result)
+            for row in comparison:
+                if row["success"]:
+                    self._store_result(
+                        text,
+                        source_language,
+                        target_language,
+                        row["model"],
+                        reference_translation,
+                        row,
+                        row["latency"],
+                        row["usage"]["total_tokens"],
+                    )
+            result = {
+                "success": True,
+                "reference_translation": reference_translation,
+                "raw_response": translation_result,
+                "comparison": comparison,
+                "timings": timings,
+            }
+            if reference_memory_stats:
+                result["translation_memory"] = self._memory_summary(
+                    reference_memory_stats
+                )
+            result["usage"] = {
+                field: sum(row["usage"][field] for row in comparison)
+                for field in ("prompt_tokens", "completion_tokens", "total_tokens")
+            }
             return result
 
         except APIError as e:
@@ -86,6 +538,809 @@ class TranslationService:
         except Exception as e:
             return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
+    async def _reference_stage(
+        self,
+        text_lines: List[str],
+        source_language: str,
+        target_language: str,
+        endpoint_url: Optional[str],
+        reference_translation: Optional[str],
+        timings: Dict[str, float],
+        memory_stats: Dict[str, Dict[str, int]],
+        use_memory: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Get the endpoint response, or wrap a reference the caller already has.
+
+        Lines found in the translation memory, or unchanged since the edit
+        session's previous run, are not sent; the endpoint's translations of
+        the rest are stitched back in order.
+        """
+        if reference_translation is not None:
+            return {"text": reference_translation}
+
+        async def translate_all() -> Dict[str, Any]:
+            return await self.translation_client.translate(
+                text_list=text_lines,
+                source_lang=source_language,
+                target_lang=target_language,
+                endpoint_url=endpoint_url,
+            )
+
+        if (
+            self.translation_memory is None or not use_memory
+        ) and current_session() is None:
+            return await self._timed(timings, "reference_translation", translate_all())
+
+        responses: List[Dict[str, Any]] = []
+
+        async def translate_missing(segments: List[str]) -> List[str]:
+            response = await self.translation_client.translate(
+                text_list=segments,
+                source_lang=source_language,
+                target_lang=target_language,
+                endpoint_url=endpoint_url,
+            )
+            responses.append(response)
+            return self._extract_translated_segments(response)
+
+        try:
+            translations = await self._timed(
+                timings,
+                "reference_translation",
+                self._translate_with_memory(
+                    f"reference:{endpoint_url or 'default'}",
+                    source_language,
+                    target_language,
+                    text_lines,
+                    translate_missing,
+                    memory_stats,
+                    "reference",
+                    use_memory,
+                ),
+            )
+        except ResponseFormatError:
+            # The endpoint's answer cannot be split per line, so nothing can be
+            # stitched; use a plain response for the whole input instead
+            if not self._reused(memory_stats["reference"]):
+                return responses[0]
+            return await self._timed(timings, "reference_translation", translate_all())
+
+        if responses and not self._reused(memory_stats["reference"]):
+            # Nothing came from memory; keep the endpoint's response as is
+            return responses[0]
+        return {"translations": [{"text": translation} for translation in translations]}
+
+    async def _llm_translation(
+        self,
+        text: str,
+        text_lines: List[str],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        memory_stats: Dict[str, Dict[str, int]],
+        segment_aligned: bool,
+        use_cache: bool,
+        on_candidate_delta: Optional[Callable[[str], None]],
+    ) -> Dict[str, Any]:
+        """
+        Get the LLM (candidate) translation, reusing the translation memory.
+
+        Segment-aligned mode looks up each line; otherwise the whole text is
+        one memory entry.
+        """
+        kind = f"candidate:{model_name}"
+
+        if segment_aligned:
+
+            async def translate_segments(segments: List[str]) -> List[str]:
+                result = await self.evaluation_client.get_segment_translations(
+                    segments,
+                    source_language,
+                    target_language,
+                    model_name,
+                    use_cache=use_cache,
+                )
+                return result["segments"]
+
+            segments = await self._translate_with_memory(
+                kind,
+                source_language,
+                target_language,
+                text_lines,
+                translate_segments,
+                memory_stats,
+                "candidate",
+                use_cache,
+            )
+            return {"segments": segments}
+
+        async def translate_document(segments: List[str]) -> List[str]:
+            if on_candidate_delta is not None:
+                result = await self._collect_stream(
+                    self.evaluation_client.stream_translation(
+                        text,
+                        source_language,
+                        target_language,
+                        model_name,
+                        use_cache=use_cache,
+                    ),
+                    on_candidate_delta,
+                )
+            else:
+                result = await self.evaluation_client.get_translation(
+                    text,
+                    source_language,
+                    target_language,
+                    model_name,
+                    use_cache=use_cache,
+                )
+            return [result["text"]]
+
+        (translation,) = await self._translate_with_memory(
+            kind,
+            source_language,
+            target_language,
+            [text],
+            translate_document,
+            memory_stats,
+            "candidate",
+            use_cache,
+        )
+        if on_candidate_delta is not None and self._reused(memory_stats["candidate"]):
+            on_candidate_delta(translation)
+        return {"text": translation}
+
+    async def _translate_with_memory(
+        self,
+        kind: str,
+        source_language: str,
+        target_language: str,
+        segments: List[str],
+        translate: Callable[[List[str]], Awaitable[List[str]]],
+        memory_stats: Dict[str, Dict[str, int]],
+        stats_key: str,
+        use_memory: bool = True,
+    ) -> List[str]:
+        """
+        Translate segments, sending only those missing from the memory.
+
+        With an edit session, segments unchanged since its previous run are
+        spliced in first and the memory is asked only for the rest.
+
+        Raises ResponseFormatError if `translate` does not return exactly one
+        translation per segment sent, since the results could not be stitched.
+        """
+        session = current_session()
+        translations: List[Optional[str]] = (
+            session.splice(kind, source_language, target_language, segments)
+            if session is not None
+            else [None] * len(segments)
+        )
+        unspliced = [i for i, found in enumerate(translations) if found is None]
+
+        memory = self.translation_memory if use_memory else None
+        if memory is not None and unspliced:
+            # SQLite calls run in a worker thread, off the shared event loop
+            found = await asyncio.to_thread(
+                memory.get_many,
+                kind,
+                source_language,
+                target_language,
+                [segments[i] for i in unspliced],
+            )
+            for i, translation in zip(unspliced, found):
+                translations[i] = translation
+        missing = [i for i, found in enumerate(translations) if found is None]
+        memory_stats[stats_key] = {
+            "hits": len(unspliced) - len(missing),
+            "session_hits": len(segments) - len(unspliced),
+            "total": len(segments),
+        }
+
+        if missing:
+            missing_segments = [segments[i] for i in missing]
+            fresh = await translate(missing_segments)
+            if len(fresh) != len(missing_segments):
+                raise ResponseFormatError(
+                    f"Got {len(fresh)} translations "
+                    f"for {len(missing_segments)} segments"
+                )
+            for i, translation in zip(missing, fresh):
+                translations[i] = translation
+            if memory is not None:
+                await asyncio.to_thread(
+                    memory.put_many,
+                    kind,
+                    source_language,
+                    target_language,
+                    missing_segments,
+                    fresh,
+                )
+        if session is not None:
+            session.remember(
+                kind, source_language, target_language, segments, translations
+            )
+        return translations
+
+    @staticmethod
+    def _reused(stats: Dict[str, int]) -> int:
+        """Segments served from the translation memory or the edit session."""
+        return stats["hits"] + stats["session_hits"]
+
+    def _store_result(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_translation: str,
+        candidate: Dict[str, Any],
+        latency: float,
+        total_tokens: int,
+    ) -> None:
+        """Queue one evaluated candidate for the results store."""
+        if self.results_store is None:
+            return
+        evaluation = candidate["evaluation"]
+        self.results_store.record(
+            {
+                "source_language": source_language,
+                "target_language": target_language,
+                "model": model_name,
+                "category": evaluation.get("category"),
+                "similarity": candidate.get("similarity_score"),
+                "gated": evaluation.get("gated"),
+                "reused": evaluation.get("reused"),
+                "latency": latency,
+                "total_tokens": total_tokens,
+                "source": text,
+                "reference": reference_translation,
+                "candidate": candidate["openai_translation"],
+                "reason": evaluation.get("reason"),
+            }
+        )
+
+    @staticmethod
+    def _memory_summary(memory_stats: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+        """Per-kind hit counts plus the overall translation memory hit rate."""
+        hits = sum(stats["hits"] for stats in memory_stats.values())
+        total = sum(stats["total"] for stats in memory_stats.values())
+        return {
+            **memory_stats,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    async def _candidate_chain(
+        self,
+        text: str,
+        text_lines: List[str],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_task: "asyncio.Future[Dict[str, Any]]",
+        timings: Dict[str, float],
+        memory_stats: Dict[str, Dict[str, int]],
+        segment_aligned: bool = False,
+        use_cache: bool = True,
+        on_candidate_delta: Optional[Callable[[str], None]] = None,
+        single_pass: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run the candidate stages, alongside a fuzzy memory lookup if enabled.
+
+        The lookup's near-duplicate matches are returned under
+        "fuzzy_matches", and the new evaluation is added to the index.
+        """
+        if self.fuzzy_memory is None or not use_cache:
+            return await self._candidate_stages(
+                text,
+                text_lines,
+                source_language,
+                target_language,
+                model_name,
+                reference_task,
+                timings,
+                memory_stats,
+                None,
+                segment_aligned,
+                use_cache,
+                on_candidate_delta,
+                single_pass,
+            )
+
+        # Embedding the source runs next to the translations; only the
+        # evaluation stage waits for the matches
+        matches_task = asyncio.ensure_future(
+            self._timed(
+                timings,
+                "fuzzy_lookup",
+                asyncio.to_thread(
+                    self._fuzzy_lookup, text, source_language, target_language
+                ),
+            )
+        )
+        try:
+            candidate = await self._candidate_stages(
+                text,
+                text_lines,
+                source_language,
+                target_language,
+                model_name,
+                reference_task,
+                timings,
+                memory_stats,
+                matches_task,
+                segment_aligned,
+                use_cache,
+                on_candidate_delta,
+                single_pass,
+            )
+            candidate["fuzzy_matches"] = await matches_task
+        finally:
+            matches_task.cancel()
+
+        # Only judge verdicts are remembered, not reused or gated categories
+        evaluation = candidate["evaluation"]
+        if not (evaluation.get("reused") or evaluation.get("gated")):
+            reference_translation = self._extract_translated_text(
+                reference_task.result()
+            )
+            await asyncio.to_thread(
+                self._fuzzy_remember,
+                text,
+                source_language,
+                target_language,
+                model_name,
+                reference_translation,
+                candidate,
+            )
+        return candidate
+
+    def _fuzzy_lookup(
+        self, text: str, source_language: str, target_language: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k past evaluations whose source is a near duplicate of text.
+
+        A source the embedder truncates is not looked up: texts that differ
+        only after the token limit would match at about 1.0.
+        """
+        if not fits_model(text):
+            return []
+        return self.fuzzy_memory.search(
+            encode_texts([text])[0],
+            source_language,
+            target_language,
+            FUZZY_MEMORY_CONFIG["top_k"],
+            FUZZY_MEMORY_CONFIG["threshold"],
+        )
+
+    def _fuzzy_remember(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_translation: str,
+        candidate: Dict[str, Any],
+    ) -> None:
+        """Add an evaluated source the embedder sees whole to the fuzzy memory."""
+        if not fits_model(text):
+            return
+        # The source embedding is served from the cache filled by the lookup
+        self.fuzzy_memory.add(
+            encode_texts([text])[0],
+            {
+                "source_language": source_language,
+                "target_language": target_language,
+                "model": model_name,
+                "source": text,
+                "reference": reference_translation,
+                "candidate": candidate["openai_translation"],
+                "category": candidate["evaluation"].get("category"),
+            },
+        )
+
+    async def _evaluate_or_reuse(
+        self,
+        matches_task: "Optional[asyncio.Future[List[Dict[str, Any]]]]",
+        text: str,
+        openai_translation: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_translation: str,
+        use_cache: bool,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate with the LLM judge, unless a fuzzy match from the same model
+        scores at least the configured reuse_threshold; its category is
+        then reused and the judge is not called.
+        """
+        reuse_threshold = FUZZY_MEMORY_CONFIG["reuse_threshold"]
+        if matches_task is not None and reuse_threshold is not None:
+            for match in await matches_task:
+                if match["model"] == model_name and match["score"] >= reuse_threshold:
+                    return {
+                        "category": match["category"],
+                        "reason": (
+                            "Reused from a prior evaluation of a near-identical "
+                            f"source ({match['score']:.0%} similar): "
+                            f"{match['source']}"
+                        ),
+                        "reused": True,
+                    }
+
+        judge = (
+            self.packed_evaluator.evaluate
+            if self.packed_evaluator is not None
+            else self.evaluation_client.evaluate_translation
+        )
+        return await judge(
+            text,
+            openai_translation,
+            source_language,
+            target_language,
+            model_name,
+            reference_translation=reference_translation,
+            use_cache=use_cache,
+        )
+
+    async def _candidate_stages(
+        self,
+        text: str,
+        text_lines: List[str],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_task: "asyncio.Future[Dict[str, Any]]",
+        timings: Dict[str, float],
+        memory_stats: Dict[str, Dict[str, int]],
+        matches_task: "Optional[asyncio.Future[List[Dict[str, Any]]]]",
+        segment_aligned: bool,
+        use_cache: bool,
+        on_candidate_delta: Optional[Callable[[str], None]],
+        single_pass: bool,
+    ) -> Dict[str, Any]:
+        """
+        Translate with one model, then score and evaluate against the reference.
+
+        The reference task is shared between chains, so it is shielded: a
+        failing or timed-out chain must not cancel it for the others.
+        """
+        single_pass_error = None
+        if single_pass and not segment_aligned and on_candidate_delta is None:
+            try:
+                return await self._single_pass_chain(
+                    text,
+                    source_language,
+                    target_language,
+                    model_name,
+                    reference_task,
+                    timings,
+                    use_cache,
+                )
+            except ResponseFormatError as e:
+                single_pass_error = str(e)
+
+        llm_call = self._llm_translation(
+            text,
+            text_lines,
+            source_language,
+            target_language,
+            model_name,
+            memory_stats,
+            segment_aligned,
+            use_cache,
+            on_candidate_delta,
+        )
+        llm_result, translation_result = await self._gather(
+            self._timed(timings, "llm_translation", llm_call),
+            asyncio.shield(reference_task),
+        )
+        reference_translation = self._extract_translated_text(translation_result)
+
+        # Stage 2: similarity and LLM evaluation both depend only on the two
+        # translations, so they run side by side as well
+        if segment_aligned:
+            candidate_segments = llm_result["segments"]
+            reference_segments = self._extract_translated_segments(translation_result)
+            if len(reference_segments) != len(text_lines):
+                raise APIError(
+                    "Reference translation is not aligned with the "
+                    f"{len(text_lines)} source lines"
+                )
+            openai_translation = "\n".join(candidate_segments)
+            # Embedding is CPU-bound; keep it off the event loop
+            similarity_stage = asyncio.to_thread(
+                self._score_segments,
+                text_lines,
+                reference_segments,
+                candidate_segments,
+            )
+        else:
+            openai_translation = llm_result["text"]
+            similarity_stage = asyncio.to_thread(
+                compute_cosine_similarity,
+                reference_translation,
+                openai_translation,
+            )
+
+        def evaluation_stage() -> Awaitable[Dict[str, Any]]:
+            return self._timed(
+                timings,
+                "evaluation",
+                self._evaluate_or_reuse(
+                    matches_task,
+                    text,
+                    openai_translation,
+                    source_language,
+                    target_language,
+                    model_name,
+                    reference_translation,
+                    use_cache,
+                ),
+            )
+
+        similarity_task = asyncio.ensure_future(
+            self._timed(timings, "similarity", similarity_stage)
+        )
+        try:
+            gate = None
+            if EVALUATION_GATE_CONFIG["enabled"]:
+                gate = await self._evaluation_gate(
+                    reference_segments if segment_aligned else [reference_translation],
+                    candidate_segments if segment_aligned else [openai_translation],
+                    similarity_task,
+                    segment_aligned,
+                    timings,
+                )
+            if gate is not None and gate["judge"] == "skipped":
+                similarity = await similarity_task
+                evaluation = self._gated_evaluation(gate)
+            else:
+                similarity, evaluation = await self._gather(
+                    similarity_task, evaluation_stage()
+                )
+        finally:
+            similarity_task.cancel()
+
+        candidate = {"openai_translation": openai_translation}
+        if gate is not None:
+            candidate["evaluation_gate"] = gate
+        if single_pass_error is not None:
+            candidate["single_pass_error"] = single_pass_error
+        if segment_aligned:
+            candidate["similarity_score"] = similarity["aggregate"]
+            candidate["segment_scores"] = similarity["segments"]
+        else:
+            candidate["similarity_score"] = similarity
+        candidate["evaluation"] = evaluation
+        return candidate
+
+    async def _evaluation_gate(
+        self,
+        reference_segments: List[str],
+        candidate_segments: List[str],
+        similarity_task: "asyncio.Future[Any]",
+        segment_aligned: bool,
+        timings: Dict[str, float],
+    ) -> Dict[str, Any]:
+        """
+        Decide whether the LLM judge is needed, cheapest tier first.
+
+        Tier 1 (chrF and length ratio) runs locally in milliseconds; only when
+        every segment passes it does the decision wait for tier 2, the cosine
+        scores. A tier 1 failure lets the judge start right away, alongside
+        the embedding.
+        """
+        lexical = await self._timed(
+            timings,
+            "lexical_gate",
+            asyncio.to_thread(
+                lexical_tier,
+                reference_segments,
+                candidate_segments,
+                EVALUATION_GATE_CONFIG,
+            ),
+        )
+        similarities = None
+        if lexical["passed"]:
+            similarity = await asyncio.shield(similarity_task)
+            similarities = (
+                [segment["similarity"] for segment in similarity["segments"]]
+                if segment_aligned
+                else [similarity]
+            )
+        gate = gate_decision(lexical, similarities, EVALUATION_GATE_CONFIG)
+        metrics.inc("evaluation_gate_total", judge=gate["judge"])
+        return gate
+
+    @staticmethod
+    def _gated_evaluation(gate: Dict[str, Any]) -> Dict[str, Any]:
+        """The evaluation recorded when the gate skips the LLM judge."""
+        return {
+            "category": EVALUATION_GATE_CONFIG["category"],
+            "reason": (
+                "LLM evaluation skipped: the translation matches the reference "
+                f"(chrF {gate['chrf']:.0%}, length ratio "
+                f"{gate['length_ratio']:.2f}, cosine similarity "
+                f"{gate['similarity']:.0%})."
+            ),
+            "gated": True,
+        }
+
+    async def _single_pass_chain(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        reference_task: "asyncio.Future[Dict[str, Any]]",
+        timings: Dict[str, float],
+        use_cache: bool,
+    ) -> Dict[str, Any]:
+        """
+        Translate and self-evaluate in one LLM request once the reference is in.
+
+        Raises ResponseFormatError when the combined answer is unusable.
+        """
+        translation_result = await asyncio.shield(reference_task)
+        reference_translation = self._extract_translated_text(translation_result)
+
+        combined = await self._timed(
+            timings,
+            "translate_and_evaluate",
+            self.evaluation_client.translate_and_evaluate(
+                text,
+                source_language,
+                target_language,
+                model_name,
+                reference_translation,
+                use_cache=use_cache,
+            ),
+        )
+        similarity = await self._timed(
+            timings,
+            "similarity",
+            asyncio.to_thread(
+                compute_cosine_similarity,
+                reference_translation,
+                combined["translation"],
+            ),
+        )
+        return {
+            "openai_translation": combined["translation"],
+            "similarity_score": similarity,
+            "evaluation": combined["evaluation"],
+            "single_pass": True,
+        }
+
+    async def stream_translate_text(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run translate_text while streaming the LLM translation.
+
+        Takes the same arguments as translate_text. The endpoint translation
+        still runs concurrently with the stream.
+
+        Yields:
+            {"type": "delta", "text": ...} for each chunk of the LLM
+            translation, then one {"type": "result", "result": ...} with the
+            full translate_text result.
+        """
+        deltas: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(
+            self.translate_text(*args, on_candidate_delta=deltas.put_nowait, **kwargs)
+        )
+        task.add_done_callback(lambda _: deltas.put_nowait(None))
+        try:
+            while (delta := await deltas.get()) is not None:
+                yield {"type": "delta", "text": delta}
+            yield {"type": "result", "result": task.result()}
+        finally:
+            task.cancel()
+
+    @staticmethod
+    async def _collect_stream(
+        stream: AsyncIterator[str], on_delta: Callable[[str], None]
+    ) -> Dict[str, Any]:
+        """Forward streamed chunks to on_delta and return the full text."""
+        parts = []
+        async for delta in stream:
+            parts.append(delta)
+            on_delta(delta)
+        return {"text": "".join(parts).strip()}
+
+    @staticmethod
+    async def _timed(
+        timings: Dict[str, float], stage: str, awaitable: Awaitable[Any]
+    ) -> Any:
+        """
+        Await a pipeline stage and record its wall-clock duration in seconds,
+        both in `timings` and in the translation_stage_seconds metric.
+        """
+        started = time.perf_counter()
+        try:
+            with metrics.span("translation_stage", stage=stage):
+                return await awaitable
+        finally:
+            timings[stage] = time.perf_counter() - started
+
+    @staticmethod
+    async def _gather(*awaitables: Awaitable[Any]) -> List[Any]:
+        """Run stages concurrently, cancelling the rest as soon as one fails."""
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @staticmethod
+    def _score_segments(
+        source_segments: List[str],
+        reference_segments: List[str],
+        candidate_segments: List[str],
+    ) -> Dict[str, Any]:
+        """
+        Score aligned segments in one batched pass.
+
+        The aggregate is the mean segment score weighted by source length, so
+        short lines such as headings do not dominate long paragraphs. With an
+        edit session, pairs already scored in its previous run are not
+        embedded again.
+        """
+        pairs = list(zip(reference_segments, candidate_segments))
+        session = current_session()
+        if session is None:
+            scores = compute_similarity_batch(pairs)
+        else:
+            scores = session.known_scores(pairs)
+            missing = [i for i, score in enumerate(scores) if score is None]
+            fresh = compute_similarity_batch([pairs[i] for i in missing])
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+            session.remember_scores(pairs, scores)
+        weights = [max(len(segment), 1) for segment in source_segments]
+        aggregate = sum(w * score for w, score in zip(weights, scores)) / sum(weights)
+        return {
+            "aggregate": aggregate,
+            "segments": [
+                {
+                    "source": source,
+                    "reference": reference,
+                    "candidate": candidate,
+                    "similarity": score,
+                }
+                for source, reference, candidate, score in zip(
+                    source_segments, reference_segments, candidate_segments, scores
+                )
+            ],
+        }
+
+    def _extract_translated_segments(self, response: Dict[str, Any]) -> List[str]:
+        """Extract per-line translations from API response."""
+        if "translations" in response:
+            return [
+                (
+                    translation_obj["text"]
+                    if isinstance(translation_obj, dict) and "text" in translation_obj
+                    else str(translation_obj)
+                )
+                for translation_obj in response["translations"]
+            ]
+        elif "text" in response:
+            text = response["text"]
+            if isinstance(text, list):
+                return [str(line) for line in text]
+            return [line.strip() for line in text.split("\n") if line.strip()]
+        else:
+            raise APIError("Unexpected translation response format")
+
     def _extract_translated_text(self, response: Dict[str, Any]) -> str:
         """Extract translated text from API response."""
         if "text" in response:
@@ -0,0 +1,137 @@
+from contextvars import ContextVar
+import difflib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+SegmentsKey = Tuple[str, str, str]
+
+
+class EditSession:
+    """
+    The previous run's segments, for re-running an edited document.
+
+    Holds, per translation kind and language pair, the source segments of
+    the last run and their translations, plus the last segment similarity
+    scores. A new run diffs its segments against the previous ones with
+    difflib, and unchanged segments take their earlier translation instead
+    of being sent to the endpoint, LLM or embedder again. Only the latest
+    run is kept, so memory stays proportional to one document.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments: Dict[SegmentsKey, Tuple[List[str], List[str]]] = {}
+        self._lines: Dict[Tuple[str, str], List[str]] = {}
+        self._scores: Dict[Tuple[str, str], float] = {}
+
+    def diff(
+        self, source_language: str, target_language: str, lines: List[str]
+    ) -> Dict[str, int]:
+        """
+        Compare lines with the previous run's source lines and remember them.
+
+        Returns how many lines are unchanged, changed (replaced or added)
+        and removed.
+        """
+        with self._lock:
+            previous = self._lines.get((source_language, target_language), [])
+            self._lines[(source_language, target_language)] = list(lines)
+        summary = {"unchanged": 0, "changed": 0, "removed": 0}
+        matcher = difflib.SequenceMatcher(None, previous, lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                summary["unchanged"] += j2 - j1
+            else:
+                summary["changed"] += j2 - j1
+                summary["removed"] += max((i2 - i1) - (j2 - j1), 0)
+        return summary
+
+    def splice(
+        self,
+        kind: str,
+        source_language: str,
+        target_language: str,
+        segments: List[str],
+    ) -> List[Optional[str]]:
+        """
+        Earlier translations for the segments the diff leaves unchanged.
+
+        Returns one entry per segment: the previous translation where the
+        segment is part of an unchanged run, None where it was edited or
+        added.
+        """
+        with self._lock:
+            previous = self._segments.get((kind, source_language, target_language))
+        translations: List[Optional[str]] = [None] * len(segments)
+        if previous is None:
+            return translations
+        previous_segments, previous_translations = previous
+        matcher = difflib.SequenceMatcher(
+            None, previous_segments, segments, autojunk=False
+        )
+        for i, j, size in matcher.get_matching_blocks():
+            translations[j : j + size] = previous_translations[i : i + size]
+        return translations
+
+    def remember(
+        self,
+        kind: str,
+        source_language: str,
+        target_language: str,
+        segments: List[str],
+        translations: List[str],
+    ) -> None:
+        """Keep this run's segments and translations for the next diff."""
+        with self._lock:
+            self._segments[(kind, source_language, target_language)] = (
+                list(segments),
+                list(translations),
+            )
+
+    def known_scores(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """The previous run's similarity for each (reference, candidate) pair."""
+        with self._lock:
+            return [self._scores.get(pair) for pair in pairs]
+
+    def remember_scores(
+        self, pairs: List[Tuple[str, str]], scores: List[float]
+    ) -> None:
+        """Replace the remembered scores with this run's."""
+        with self._lock:
+            self._scores = dict(zip(pairs, scores))
+
+    def adopt(
+        self, other: "EditSession", source_language: str, target_language: str
+    ) -> None:
+        """
+        Take over other's segments and scores for one language pair.
+
+        Used when this session's caller joined a run made for another
+        session, so its next diff starts from the same run. Source lines are
+        not copied: diff() records them.
+        """
+        with other._lock:
+            segments = {
+                key: value
+                for key, value in other._segments.items()
+                if key[1:] == (source_language, target_language)
+            }
+            scores = dict(other._scores)
+        with self._lock:
+            self._segments.update(segments)
+            self._scores = scores
+
+
+_current_session: ContextVar[Optional[EditSession]] = ContextVar(
+    "edit_session", default=None
+)
+
+
+def use_session(session: Optional[EditSession]) -> None:
+    """Make session visible to the current task and the tasks it starts."""
+    _current_session.set(session)
+
+
+def current_session() -> Optional[EditSession]:
+    """The EditSession of the run in progress, if the caller passed one."""
+    return _current_session.get()
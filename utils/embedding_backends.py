@@ -0,0 +1,145 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Hugging Face organisation hosting the sentence-transformers checkpoints
+HUB_ORGANIZATION = "sentence-transformers"
+
+
+def embedding_space_id(model_name: str, config: Dict[str, Any]) -> str:
+    """
+    Identify the vectors a backend produces, for cache keys and directories.
+
+    Backends agree only to within float tolerance, so each gets its own
+    space; the default keeps the bare model name used by existing caches.
+    """
+    if config["backend"] == "sentence-transformers":
+        return model_name
+    return f"{model_name}-onnx-int8" if config["quantize"] else f"{model_name}-onnx"
+
+
+class SentenceTransformerBackend:
+    """The sentence-transformers model on PyTorch (imports torch on creation)."""
+
+    def __init__(self, model_name: str):
+        # Deferred: importing sentence_transformers pulls in torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 rows."""
+        return self.model.encode(texts, normalize_embeddings=True)
+
+    def truncates(self, text: str) -> bool:
+        """Whether text has more tokens than the model embeds."""
+        tokens = self.model.tokenizer(text, verbose=False)["input_ids"]
+        return len(tokens) > self.model.max_seq_length
+
+
+class OnnxBackend:
+    """
+    The same checkpoint's ONNX export on ONNX Runtime, without torch.
+
+    Uses the Hub repo's onnx/model.onnx and tokenizer.json, and reproduces
+    the sentence-transformers pipeline (truncation, attention-masked mean
+    pooling, L2 normalization) in NumPy. With quantize set, the weights are
+    dynamically quantized to int8 once and the result is kept in cache_dir.
+    Requires the optional onnxruntime and tokenizers packages.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = False,
+        max_length: int = 256,
+        batch_size: int = 32,
+        threads: Optional[int] = None,
+        cache_dir: str = ".cache/onnx",
+    ):
+        from huggingface_hub import hf_hub_download
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        repo_id = (
+            model_name if "/" in model_name else f"{HUB_ORGANIZATION}/{model_name}"
+        )
+        model_path = hf_hub_download(repo_id, "onnx/model.onnx")
+        if quantize:
+            model_path = self._quantized(model_path, model_name, cache_dir)
+
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(repo_id, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    @staticmethod
+    def _quantized(model_path: str, model_name: str, cache_dir: str) -> str:
+        """Path of the int8 copy of model_path, creating it on first use."""
+        file_name = model_name.replace("/", "--")
+        quantized_path = os.path.join(cache_dir, f"{file_name}-int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import quantize_dynamic
+            from onnxruntime.quantization import QuantType
+
+            os.makedirs(cache_dir, exist_ok=True)
+            partial_path = f"{quantized_path}.partial"
+            quantize_dynamic(model_path, partial_path, weight_type=QuantType.QInt8)
+            os.replace(partial_path, quantized_path)
+        return quantized_path
+
+    def truncates(self, text: str) -> bool:
+        """Whether text has more tokens than max_length."""
+        return bool(self.tokenizer.encode(text).overflowing)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 rows."""
+        batches = [
+            self._encode_batch(texts[start : start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(batches) if batches else np.zeros((0, 0), np.float32)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        # Some exports take no token_type_ids
+        feeds = {name: feed for name, feed in feeds.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(
+            mask.sum(axis=1), 1e-9
+        )
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def create_backend(model_name: str, config: Dict[str, Any]) -> Any:
+    """Build the embedding backend selected by EMBEDDING_BACKEND_CONFIG."""
+    if config["backend"] == "sentence-transformers":
+        return SentenceTransformerBackend(model_name)
+    if config["backend"] == "onnx":
+        return OnnxBackend(
+            model_name,
+            quantize=config["quantize"],
+            max_length=config["max_length"],
+            threads=config["threads"],
+            cache_dir=config["cache_dir"],
+        )
+    raise ValueError(f"Unknown embedding backend: {config['backend']}")
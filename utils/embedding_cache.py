@@ -0,0 +1,192 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.file_lock import file_lock
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Content hash identifying the embedding of a text under a model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed embedding cache.
+
+    Lookups go to a bounded in-memory LRU first and then to an optional
+    on-disk store, which keeps embeddings across process restarts. The disk
+    store is an append-only float32 matrix (memory-mapped for reads) plus a
+    text index of keys, one per row. Several processes can share it: appends
+    are serialized with a file lock, and each process picks up the others'
+    rows from the index.
+    """
+
+    INDEX_FILE = "index.txt"
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+    LOCK_FILE = "lock"
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._row_count = 0
+        # Bytes of the key index already read into _rows
+        self._index_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            with file_lock(self._path(self.LOCK_FILE)):
+                self._sync_index(repair=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _sync_index(self, repair: bool = False) -> None:
+        """
+        Index the rows appended since this process last looked, by any process.
+
+        A row counts once its key line is complete; its vector is written
+        first. With repair, which needs the file lock (no writer is then
+        mid-append), a row torn by an interrupted write is cut from both
+        files so the next append lines up again.
+        """
+        if self._dim is None:
+            if not os.path.exists(self._path(self.META_FILE)):
+                return
+            with open(self._path(self.META_FILE), encoding="utf-8") as meta:
+                self._dim = json.load(meta)["dim"]
+
+        row_bytes = self._dim * np.dtype(np.float32).itemsize
+        index_path = self._path(self.INDEX_FILE)
+        vectors_path = self._path(self.VECTORS_FILE)
+        vectors_size = (
+            os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        )
+        data = b""
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as index:
+                index.seek(self._index_offset)
+                data = index.read()
+
+        consumed = 0
+        # The last piece is empty or a key line still being written
+        for line in data.split(b"\n")[:-1]:
+            if len(line) != 64 or (self._row_count + 1) * row_bytes > vectors_size:
+                break
+            self._rows.setdefault(line.decode("ascii"), self._row_count)
+            self._row_count += 1
+            consumed += len(line) + 1
+        self._index_offset += consumed
+
+        if repair:
+            # Keep both files in lockstep so appended rows line up with keys
+            if consumed != len(data):
+                with open(index_path, "r+b") as index:
+                    index.truncate(self._index_offset)
+            if vectors_size != self._row_count * row_bytes:
+                with open(vectors_path, "r+b") as vectors:
+                    vectors.truncate(self._row_count * row_bytes)
+
+    def _read_row(self, row: int) -> np.ndarray:
+        """Read one stored vector, remapping the file if it has grown."""
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            rows = os.path.getsize(self._path(self.VECTORS_FILE)) // (
+                self._dim * np.dtype(np.float32).itemsize
+            )
+            self._mmap = np.memmap(
+                self._path(self.VECTORS_FILE),
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self._dim),
+            )
+        return np.array(self._mmap[row])
+
+    def _append(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        """
+        Persist vectors; data rows are written before their index entries.
+
+        Runs under the file lock, and rows are numbered from the vector
+        file's size at that point, so appends from several processes never
+        share a row.
+        """
+        with file_lock(self._path(self.LOCK_FILE)):
+            self._sync_index(repair=True)
+            if self._dim is None:
+                self._dim = int(items[0][1].shape[0])
+                with open(self._path(self.META_FILE), "w", encoding="utf-8") as meta:
+                    json.dump({"dim": self._dim}, meta)
+            items = [
+                (key, vector)
+                for key, vector in items
+                if vector.shape[0] == self._dim and key not in self._rows
+            ]
+            if not items:
+                return
+
+            row_bytes = self._dim * np.dtype(np.float32).itemsize
+            with open(self._path(self.VECTORS_FILE), "ab") as vectors:
+                first_row = vectors.seek(0, os.SEEK_END) // row_bytes
+                vectors.write(b"".join(vector.tobytes() for _, vector in items))
+            with open(self._path(self.INDEX_FILE), "a", encoding="utf-8") as index:
+                index.writelines(key + "\n" for key, _ in items)
+            for row, (key, _) in enumerate(items, first_row):
+                self._rows[key] = row
+            self._row_count = first_row + len(items)
+            self._index_offset += len(items) * 65
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for key, or None."""
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                return vector
+
+            row = self._rows.get(key)
+            if row is None and self.directory:
+                # Another process may have stored it since
+                self._sync_index()
+                row = self._rows.get(key)
+            if row is None:
+                return None
+            vector = self._read_row(row)
+            self._remember(key, vector)
+            return vector
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Cache an embedding in memory and, if configured, on disk."""
+        self.put_many([(key, vector)])
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        """Cache several embeddings with a single disk append."""
+        items = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in items]
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if self.directory:
+                new_items = {
+                    key: vector for key, vector in items if key not in self._rows
+                }
+                if new_items:
+                    self._append(list(new_items.items()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lru.keys() | self._rows.keys())
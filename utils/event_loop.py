@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever on a daemon thread.
+
+    Synchronous callers (Streamlit script threads) submit coroutines with
+    run() and block only their own thread until the result is ready, so
+    many callers can share one loop, and everything bound to it (connection
+    pools, locks, rate limiters) lives as long as the process.
+    """
+
+    def __init__(self, name: str = "background-event-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(
+        self, coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None
+    ) -> T:
+        """
+        Run a coroutine on the loop and wait for its result.
+
+        If the waiting thread is interrupted (e.g. Streamlit stops a script
+        on rerun), the coroutine is cancelled rather than left running.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, events: AsyncIterator[T]) -> Iterator[T]:
+        """Drive an async iterator on the loop from synchronous code."""
+
+        async def next_event() -> T:
+            return await events.__anext__()
+
+        async def close() -> None:
+            await events.aclose()
+
+        try:
+            while True:
+                try:
+                    yield self.run(next_event())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(close())
+
+    def stop(self) -> None:
+        """Stop the loop and wait for its thread to exit."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,25 @@
+import contextlib
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, a single writer is assumed
+    fcntl = None
+
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on path (created if missing).
+
+    Serializes writers across processes, e.g. the app, the batch runner and
+    the API server appending to the same on-disk store.
+    """
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.file_lock import file_lock
+
+# Rows per block when assigning the whole matrix to IVF lists
+_ASSIGN_BLOCK = 65536
+
+
+class FuzzyMemory:
+    """
+    In-process vector index of past evaluations for near-duplicate lookup.
+
+    Each row pairs an L2-normalized source embedding with its record (source,
+    reference, candidate, category, model, language pair). Vectors live in an
+    append-only float32 matrix that is memory-mapped for search, records in
+    a JSON-lines file, one per row. Several processes can share it: appends
+    are serialized with a file lock, and each process picks up the others'
+    rows before searching.
+
+    Search is a brute-force matmul over the matrix. Past ivf_min_rows rows an
+    IVF partition (spherical k-means over sqrt(N) lists) restricts the scan to
+    the ivf_probes lists whose centroids are nearest the query.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    RECORDS_FILE = "records.jsonl"
+    META_FILE = "meta.json"
+    LOCK_FILE = "lock"
+
+    def __init__(self, directory: str, ivf_min_rows: int = 50000, ivf_probes: int = 8):
+        self.directory = directory
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_probes = ivf_probes
+        self._lock = threading.Lock()
+
+        self._dim: Optional[int] = None
+        self._records: List[Dict[str, Any]] = []
+        self._pair_ids: Dict[Tuple[str, str], int] = {}
+        self._row_pairs = np.zeros(0, dtype=np.int32)
+        self._seen: set = set()
+        # Bytes of the records file already indexed
+        self._records_offset = 0
+        self._mmap: Optional[np.memmap] = None
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._ivf_rows = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(self._path(self.LOCK_FILE)):
+            self._sync(repair=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _sync(self, repair: bool = False) -> None:
+        """
+        Index the rows appended since this process last looked, by any process.
+
+        A row counts once its record line is complete; its vector is written
+        first. With repair, which needs the file lock (no writer is then
+        mid-append), a row torn by an interrupted write is cut from both
+        files so the next append lines up again.
+        """
+        if self._dim is None:
+            if not os.path.exists(self._path(self.META_FILE)):
+                return
+            with open(self._path(self.META_FILE), encoding="utf-8") as meta:
+                self._dim = json.load(meta)["dim"]
+
+        row_bytes = self._dim * np.dtype(np.float32).itemsize
+        records_path = self._path(self.RECORDS_FILE)
+        vectors_path = self._path(self.VECTORS_FILE)
+        vectors_size = (
+            os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        )
+        data = b""
+        if os.path.exists(records_path):
+            with open(records_path, "rb") as lines:
+                lines.seek(self._records_offset)
+                data = lines.read()
+
+        records = []
+        consumed = 0
+        rows = len(self._records)
+        # The last piece is empty or a record still being written
+        for line in data.split(b"\n")[:-1]:
+            if (rows + len(records) + 1) * row_bytes > vectors_size:
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            consumed += len(line) + 1
+        self._records_offset += consumed
+        if records:
+            self._index_records(records)
+
+        if repair:
+            # Keep both files in lockstep so appended rows line up with records
+            if consumed != len(data):
+                with open(records_path, "r+b") as lines:
+                    lines.truncate(self._records_offset)
+            if vectors_size != len(self._records) * row_bytes:
+                with open(vectors_path, "r+b") as vectors:
+                    vectors.truncate(len(self._records) * row_bytes)
+
+    def _index_records(self, records: List[Dict[str, Any]]) -> None:
+        pair_ids = [
+            self._pair_ids.setdefault(
+                (record["source_language"], record["target_language"]),
+                len(self._pair_ids),
+            )
+            for record in records
+        ]
+        self._row_pairs = np.concatenate(
+            [self._row_pairs, np.asarray(pair_ids, dtype=np.int32)]
+        )
+        self._records.extend(records)
+        self._seen.update(self._record_key(record) for record in records)
+
+    @staticmethod
+    def _record_key(record: Dict[str, Any]) -> Tuple[str, ...]:
+        return (
+            record["source_language"],
+            record["target_language"],
+            record["model"],
+            record["source"],
+        )
+
+    def _matrix(self) -> np.ndarray:
+        """Memory-mapped vectors, remapped whenever rows have been appended."""
+        rows = len(self._records)
+        if self._mmap is None or self._mmap.shape[0] != rows:
+            self._mmap = np.memmap(
+                self._path(self.VECTORS_FILE),
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self._dim),
+            )
+        return self._mmap
+
+    def add(self, vector: np.ndarray, record: Dict[str, Any]) -> None:
+        """
+        Append an evaluated source and its record.
+
+        A source already stored for the same model and language pair is
+        skipped, so re-running a corpus does not grow the index.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self._record_key(record) in self._seen:
+                return
+            with file_lock(self._path(self.LOCK_FILE)):
+                self._sync(repair=True)
+                # Another process may have stored it meanwhile
+                if self._record_key(record) in self._seen:
+                    return
+                if self._dim is None:
+                    self._dim = int(vector.shape[0])
+                    with open(
+                        self._path(self.META_FILE), "w", encoding="utf-8"
+                    ) as meta:
+                        json.dump({"dim": self._dim}, meta)
+                if vector.shape[0] != self._dim:
+                    return
+
+                # The vector row is written before its record; after the sync
+                # both files end at the same row, whoever wrote the others
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                with open(self._path(self.VECTORS_FILE), "ab") as vectors:
+                    vectors.write(vector.tobytes())
+                with open(self._path(self.RECORDS_FILE), "ab") as lines:
+                    lines.write(line)
+                self._records_offset += len(line)
+                self._index_records([record])
+
+    def search(
+        self,
+        vector: np.ndarray,
+        source_language: str,
+        target_language: str,
+        top_k: int,
+        threshold: float,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to top_k records for the language pair whose source is at
+        least `threshold` cosine-similar to the query, best first.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            # Pick up rows other processes have added
+            self._sync()
+            pair_id = self._pair_ids.get((source_language, target_language))
+            if pair_id is None or query.shape[0] != self._dim:
+                return []
+
+            rows = self._candidate_rows(query)
+            if rows is None:
+                # Full scan: one contiguous matmul, then keep the pair's rows
+                rows = np.flatnonzero(self._row_pairs == pair_id)
+                scores = (self._matrix() @ query)[rows]
+            else:
+                rows = rows[self._row_pairs[rows] == pair_id]
+                scores = self._matrix()[rows] @ query
+            if not rows.size:
+                return []
+
+            k = min(top_k, rows.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {**self._records[rows[i]], "score": float(scores[i])}
+                for i in top
+                if scores[i] >= threshold
+            ]
+
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Rows in the IVF lists nearest the query, or None to scan them all."""
+        rows = len(self._records)
+        if rows < self.ivf_min_rows:
+            return None
+        # Re-partition whenever the index has doubled since the last build
+        if self._centroids is None or rows >= 2 * self._ivf_rows:
+            self._build_ivf(rows)
+
+        nearest = np.argsort(self._centroids @ query)[-self.ivf_probes :]
+        # Rows appended since the last build are not in any list yet
+        return np.concatenate(
+            [self._lists[i] for i in nearest] + [np.arange(self._ivf_rows, rows)]
+        )
+
+    def _build_ivf(self, rows: int) -> None:
+        """Partition the first `rows` vectors with spherical k-means."""
+        matrix = self._matrix()[:rows]
+        n_lists = int(np.sqrt(rows))
+        rng = np.random.default_rng(0)
+
+        sample = np.asarray(
+            matrix[np.sort(rng.choice(rows, min(rows, n_lists * 64), replace=False))]
+        )
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(10):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = sample[assignment == i]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[i] = centroid / np.linalg.norm(centroid)
+
+        assignment = np.concatenate(
+            [
+                np.argmax(matrix[start : start + _ASSIGN_BLOCK] @ centroids.T, axis=1)
+                for start in range(0, rows, _ASSIGN_BLOCK)
+            ]
+        )
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(n_lists)]
+        self._centroids = centroids
+        self._ivf_rows = rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
@@ -0,0 +1,223 @@
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+# Histogram bucket upper bounds in seconds, shared by every duration metric
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class _NullSpan:
+    """Span used while metrics are disabled: no timing, no allocation."""
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times a block into the `<name>_seconds` histogram, and OTel if enabled."""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self._otel_span: Optional[Any] = None
+
+    def __enter__(self) -> "_Span":
+        if self.registry.tracer is not None:
+            self._otel_span = self.registry.tracer.start_as_current_span(
+                self.name, attributes=self.labels
+            )
+            self._otel_span.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.registry.observe(
+            f"{self.name}_seconds", time.perf_counter() - self._started, **self.labels
+        )
+        if self._otel_span is not None:
+            self._otel_span.__exit__(*exc_info)
+
+
+class MetricsRegistry:
+    """
+    In-process counters and duration histograms, rendered as Prometheus text.
+
+    Label values are stringified; keep them low-cardinality (stage, model,
+    deployment, status). When disabled, every call returns immediately and
+    span() hands out a shared no-op context manager. With opentelemetry set,
+    spans are also emitted through the global OpenTelemetry tracer if the
+    optional opentelemetry-api package is installed.
+    """
+
+    def __init__(self, enabled: bool = True, opentelemetry: bool = False):
+        self.enabled = enabled
+        self.tracer: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        # Per label set: cumulative bucket counts, then sum and count
+        self._histograms: Dict[str, Dict[LabelSet, List[float]]] = {}
+
+        if enabled and opentelemetry:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                pass
+            else:
+                self.tracer = trace.get_tracer("translation_evaluator")
+
+    @staticmethod
+    def _label_set(labels: Dict[str, Any]) -> LabelSet:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        key = self._label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation in a duration histogram."""
+        if not self.enabled:
+            return
+        key = self._label_set(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            buckets = series.get(key)
+            if buckets is None:
+                buckets = series[key] = [0.0] * (len(DURATION_BUCKETS) + 2)
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            buckets[-2] += value
+            buckets[-1] += 1
+
+    def span(self, name: str, **labels: Any) -> Any:
+        """Context manager timing a block into the `<name>_seconds` histogram."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, {key: str(value) for key, value in labels.items()})
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+
+        def labels_text(labels: LabelSet, extra: str = "") -> str:
+            parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{labels_text(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, buckets in series.items():
+                    for bound, count in zip(DURATION_BUCKETS, buckets):
+                        le = labels_text(labels, f'le="{bound:g}"')
+                        lines.append(f"{name}_bucket{le} {count:g}")
+                    le = labels_text(labels, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{le} {buckets[-1]:g}")
+                    lines.append(f"{name}_sum{labels_text(labels)} {buckets[-2]:.6f}")
+                    lines.append(f"{name}_count{labels_text(labels)} {buckets[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide registry used by the API clients, similarity and the service
+metrics = MetricsRegistry(
+    enabled=METRICS_CONFIG["enabled"],
+    opentelemetry=METRICS_CONFIG["opentelemetry"],
+)
+
+# Token usage of the request being handled; child tasks share the same dict
+_request_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "request_usage", default=None
+)
+
+
+def track_usage() -> Dict[str, int]:
+    """
+    Start collecting LLM token usage for the current task and the tasks it
+    starts from here on. Returns the dict that record_usage fills in.
+    """
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    _request_usage.set(usage)
+    return usage
+
+
+def current_usage() -> Optional[Dict[str, int]]:
+    """The dict collecting the current request's usage, if it tracks any."""
+    return _request_usage.get()
+
+
+def record_usage(model_name: str, usage: Dict[str, Any]) -> None:
+    """Count the `usage` block of a chat completion, globally and per request."""
+    request_usage = _request_usage.get()
+    for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        count = usage.get(field) or 0
+        if field != "total_tokens":
+            kind = field[: -len("_tokens")]
+            metrics.inc("llm_tokens_total", count, model=model_name, type=kind)
+        if request_usage is not None:
+            request_usage[field] += count
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> None:
+    """
+    Serve GET /metrics in Prometheus text format from a daemon thread.
+
+    Safe to call repeatedly (e.g. on every Streamlit rerun); only the first
+    call starts a server.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(
+            target=_server.serve_forever, name="metrics-server", daemon=True
+        ).start()
@@ -0,0 +1,147 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# chrF settings as in sacreBLEU: character 1..6-grams, recall weighted 2x
+CHRF_ORDER = 6
+CHRF_BETA = 2.0
+
+
+def _character_codes(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Code points of all texts, whitespace removed, and each one's text index."""
+    stripped = ["".join(text.split()) for text in texts]
+    lengths = np.fromiter((len(text) for text in stripped), np.int64, len(stripped))
+    codes = np.frombuffer("".join(stripped).encode("utf-32-le"), dtype=np.uint32)
+    return codes.astype(np.int64), np.repeat(np.arange(len(texts)), lengths)
+
+
+def _ngram_rows(codes: np.ndarray, owners: np.ndarray, order: int) -> np.ndarray:
+    """
+    One (text index, code points...) row per character n-gram.
+
+    Windows are taken over the concatenation of all texts, and those that
+    straddle two texts are dropped.
+    """
+    if len(codes) < order:
+        return np.zeros((0, order + 1), np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(codes, order)
+    starts = owners[: len(windows)]
+    inside = starts == owners[order - 1 :]
+    return np.column_stack([starts[inside], windows[inside]])
+
+
+def chrf_scores(references: List[str], candidates: List[str]) -> np.ndarray:
+    """
+    Sentence-level chrF of each candidate against its reference, in [0, 1].
+
+    All pairs are scored at once: per n-gram order, the n-grams of every
+    text are counted with a single np.unique over (pair, n-gram) rows, and
+    the clipped matches are summed per pair with np.bincount. The score is
+    the F-beta averaged over the orders both texts are long enough for.
+    """
+    count = len(references)
+    ref_codes, ref_owners = _character_codes(references)
+    cand_codes, cand_owners = _character_codes(candidates)
+
+    f_sum = np.zeros(count)
+    orders = np.zeros(count)
+    factor = CHRF_BETA**2
+    for order in range(1, CHRF_ORDER + 1):
+        ref_rows = _ngram_rows(ref_codes, ref_owners, order)
+        cand_rows = _ngram_rows(cand_codes, cand_owners, order)
+        ref_totals = np.bincount(ref_rows[:, 0], minlength=count)
+        cand_totals = np.bincount(cand_rows[:, 0], minlength=count)
+
+        matches = np.zeros(count)
+        if len(ref_rows) and len(cand_rows):
+            unique, inverse = np.unique(
+                np.vstack([ref_rows, cand_rows]), axis=0, return_inverse=True
+            )
+            inverse = inverse.reshape(-1)
+            clipped = np.minimum(
+                np.bincount(inverse[: len(ref_rows)], minlength=len(unique)),
+                np.bincount(inverse[len(ref_rows) :], minlength=len(unique)),
+            )
+            matches = np.bincount(unique[:, 0], weights=clipped, minlength=count)
+
+        counted = (ref_totals > 0) & (cand_totals > 0)
+        precision = matches / np.maximum(cand_totals, 1)
+        recall = matches / np.maximum(ref_totals, 1)
+        denominator = factor * precision + recall
+        f_score = np.divide(
+            (1 + factor) * precision * recall,
+            denominator,
+            out=np.zeros(count),
+            where=denominator > 0,
+        )
+        f_sum += np.where(counted, f_score, 0.0)
+        orders += counted
+
+    scores = np.divide(f_sum, orders, out=np.zeros(count), where=orders > 0)
+    # Two empty texts are identical
+    both_empty = (np.bincount(ref_owners, minlength=count) == 0) & (
+        np.bincount(cand_owners, minlength=count) == 0
+    )
+    return np.where(both_empty, 1.0, scores)
+
+
+def length_ratios(references: List[str], candidates: List[str]) -> np.ndarray:
+    """Candidate length over reference length, in characters, per pair."""
+    ref_lengths = np.array([len(text.strip()) for text in references], np.float64)
+    cand_lengths = np.array([len(text.strip()) for text in candidates], np.float64)
+    return np.divide(
+        cand_lengths,
+        ref_lengths,
+        out=np.where(cand_lengths > 0, np.inf, 1.0),
+        where=ref_lengths > 0,
+    )
+
+
+def lexical_tier(
+    references: List[str], candidates: List[str], config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    First gating tier: chrF and length ratio for every segment.
+
+    "passed" is True when every segment clears both thresholds, so the
+    cosine tier decides whether the LLM judge is still needed.
+    """
+    chrf = chrf_scores(references, candidates)
+    ratios = length_ratios(references, candidates)
+    low, high = config["length_ratio"]
+    in_range = (ratios >= low) & (ratios <= high)
+    passed = bool(np.all(chrf >= config["min_chrf"]) and np.all(in_range))
+    if not len(chrf):
+        return {"chrf": 1.0, "length_ratio": 1.0, "passed": passed}
+    # Report the worst segment: lowest chrF, ratio furthest from 1
+    worst = np.argmax(np.abs(np.log(np.maximum(ratios, 1e-9))))
+    return {
+        "chrf": float(chrf.min()),
+        "length_ratio": float(ratios[worst]),
+        "passed": passed,
+    }
+
+
+def gate_decision(
+    lexical: Dict[str, Any],
+    similarities: Optional[List[float]],
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Combine both tiers into the decision recorded with the result.
+
+    similarities holds the per-segment cosine scores, or None when the
+    lexical tier already failed and the cosine tier was not consulted.
+    """
+    decision = {"chrf": lexical["chrf"], "length_ratio": lexical["length_ratio"]}
+    if similarities is None:
+        decision.update(similarity=None, decided_by="lexical", judge="called")
+        return decision
+    similarity = min(similarities)
+    skip = similarity >= config["min_similarity"]
+    decision.update(
+        similarity=similarity,
+        decided_by="similarity",
+        judge="skipped" if skip else "called",
+    )
+    return decision
@@ -0,0 +1,304 @@
+from datetime import datetime
+from datetime import timezone
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from api_clients.evaluation_client import EVALUATION_CATEGORIES
+from utils.metrics import metrics
+
+# Columns written per evaluation, in table order
+COLUMNS = (
+    "created_at",
+    "day",
+    "source_language",
+    "target_language",
+    "model",
+    "category",
+    "similarity",
+    "gated",
+    "reused",
+    "latency",
+    "total_tokens",
+    "source",
+    "reference",
+    "candidate",
+    "reason",
+)
+
+# Time buckets for aggregate(), as SQL over the rollup's ISO "day" column
+BUCKETS = {
+    "day": "day",
+    "week": "strftime('%Y-W%W', day)",
+    "month": "substr(day, 1, 7)",
+    "all": "'all'",
+}
+
+# Columns aggregate() may group by
+GROUP_COLUMNS = ("model", "source_language", "target_language")
+
+# Rollup primary key: one row per day, model and language pair
+ROLLUP_KEY = ("day", "model", "source_language", "target_language")
+
+# Rollup column holding each category's count
+CATEGORY_COLUMNS = {
+    category: "category_" + category.replace(" ", "_")
+    for category in EVALUATION_CATEGORIES
+}
+
+
+class ResultsStore:
+    """
+    Append-only SQLite store of evaluation results, for quality tracking.
+
+    record() only enqueues the row: a background thread (started on first
+    use) writes queued rows in batches of up to batch_size, one transaction
+    per batch, waiting at most flush_interval seconds for a batch to fill.
+    The same transaction folds the batch into a daily rollup per model and
+    language pair, which is what aggregate() reads. Its cost scales with
+    days x models x pairs, not with the number of evaluations.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS evaluations (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                model TEXT NOT NULL,
+                category TEXT,
+                similarity REAL,
+                gated INTEGER NOT NULL,
+                reused INTEGER NOT NULL,
+                latency REAL,
+                total_tokens INTEGER,
+                source TEXT NOT NULL,
+                reference TEXT,
+                candidate TEXT,
+                reason TEXT
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS evaluations_created_at "
+            "ON evaluations (created_at)"
+        )
+        category_columns = "".join(
+            f"{column} INTEGER NOT NULL DEFAULT 0,\n"
+            for column in CATEGORY_COLUMNS.values()
+        )
+        self._connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS daily_rollup (
+                day TEXT NOT NULL,
+                model TEXT NOT NULL,
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                similarity_sum REAL NOT NULL,
+                similarity_count INTEGER NOT NULL,
+                {category_columns}
+                PRIMARY KEY ({', '.join(ROLLUP_KEY)})
+            ) WITHOUT ROWID"""
+        )
+        self._connection.commit()
+
+    def record(self, row: Dict[str, Any]) -> None:
+        """
+        Queue one evaluation for writing; never blocks on the database.
+
+        row holds the COLUMNS fields; created_at defaults to now and day is
+        derived from it (UTC). The category is lowercased, as judges answer
+        "Excellent" as well as "excellent".
+        """
+        created_at = row.get("created_at") or time.time()
+        day = datetime.fromtimestamp(created_at, timezone.utc).strftime("%Y-%m-%d")
+        category = row.get("category")
+        if category is not None:
+            category = str(category).strip().lower()
+        self._ensure_writer()
+        self._queue.put(
+            {**row, "category": category, "created_at": created_at, "day": day}
+        )
+
+    def flush(self) -> None:
+        """Block until every queued row has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, stop the writer and close the database."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            self._connection.close()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="results-store", daemon=True
+                    )
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(
+                        self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    )
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    self._insert(rows)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        placeholders = ",".join("?" * len(COLUMNS))
+        values = [
+            tuple(
+                int(bool(row.get(column)))
+                if column in ("gated", "reused")
+                else row.get(column)
+                for column in COLUMNS
+            )
+            for row in rows
+        ]
+        try:
+            with self._lock, self._connection:
+                self._connection.executemany(
+                    f"INSERT INTO evaluations ({','.join(COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    values,
+                )
+                self._update_rollup(rows)
+        except sqlite3.Error:
+            # Losing history must not take the service down
+            metrics.inc("results_store_write_errors_total", len(rows))
+            return
+        metrics.inc("results_store_rows_total", len(rows))
+
+    def _update_rollup(self, rows: List[Dict[str, Any]]) -> None:
+        """Add a batch to the daily rollup, one upsert per touched group."""
+        categories = list(EVALUATION_CATEGORIES)
+        groups: Dict[tuple, List[float]] = {}
+        for row in rows:
+            key = tuple(row[column] for column in ROLLUP_KEY)
+            totals = groups.setdefault(key, [0] * (3 + len(categories)))
+            totals[0] += 1
+            if row.get("similarity") is not None:
+                totals[1] += row["similarity"]
+                totals[2] += 1
+            if row.get("category") in categories:
+                totals[3 + categories.index(row["category"])] += 1
+
+        counters = ["count", "similarity_sum", "similarity_count"]
+        counters += CATEGORY_COLUMNS.values()
+        columns = [*ROLLUP_KEY, *counters]
+        updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in counters)
+        self._connection.executemany(
+            f"INSERT INTO daily_rollup ({', '.join(columns)}) "
+            f"VALUES ({','.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET {updates}",
+            [(*key, *totals) for key, totals in groups.items()],
+        )
+
+    def aggregate(
+        self,
+        group_by: Sequence[str] = ("model",),
+        bucket: str = "day",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        models: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluation counts, mean similarity and category distribution.
+
+        Args:
+            group_by: Any of GROUP_COLUMNS
+            bucket: Time bucket out of BUCKETS ("all" for no time axis)
+            since: First day included, "YYYY-MM-DD"
+            until: Last day included, "YYYY-MM-DD"
+            models: Restrict to these models
+
+        Returns:
+            One dict per bucket and group with "bucket", the group columns,
+            "count", "mean_similarity" and a count per category, oldest
+            bucket first.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        unknown = [column for column in group_by if column not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group by: {', '.join(unknown)}")
+
+        conditions, parameters = [], []
+        if since:
+            conditions.append("day >= ?")
+            parameters.append(since)
+        if until:
+            conditions.append("day <= ?")
+            parameters.append(until)
+        if models:
+            conditions.append(f"model IN ({','.join('?' * len(models))})")
+            parameters.extend(models)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        keys = ["bucket", *group_by]
+        category_counts = ", ".join(
+            f"SUM({column})" for column in CATEGORY_COLUMNS.values()
+        )
+        query = (
+            f"SELECT {BUCKETS[bucket]} AS bucket"
+            + "".join(f", {column}" for column in group_by)
+            + ", SUM(count), SUM(similarity_sum) / NULLIF(SUM(similarity_count), 0), "
+            f"{category_counts} FROM daily_rollup {where} "
+            f"GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}"
+        )
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+
+        results = []
+        for row in rows:
+            count, mean_similarity, *categories = row[len(keys) :]
+            result = dict(zip(keys, row))
+            result.update(count=count, mean_similarity=mean_similarity)
+            result.update(zip(EVALUATION_CATEGORIES, (n or 0 for n in categories)))
+            results.append(result)
+        return results
+
+    def models(self) -> List[str]:
+        """Every model with stored evaluations."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT model FROM daily_rollup ORDER BY model"
+            ).fetchall()
+        return [model for (model,) in rows]
@@ -1,10 +1,119 @@
-from typing import List
+import os
+import threading
+from typing import Any, List, Optional, Tuple
 
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from config import EMBEDDING_BACKEND_CONFIG
+from config import EMBEDDING_CACHE_CONFIG
+from config import EMBEDDING_MODEL_NAME
+import numpy as np
 
-# Initialize the model (this will be done once when the module is imported)
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from utils.embedding_backends import create_backend
+from utils.embedding_backends import embedding_space_id
+from utils.embedding_cache import embedding_key
+from utils.embedding_cache import EmbeddingCache
+from utils.metrics import metrics
+
+# The model and cache are created on first use and then shared by the whole
+# process, so importing this module stays cheap (no torch import, no model load)
+_model: Optional[Any] = None
+# Vectors from different backends are kept apart in the caches
+EMBEDDING_SPACE = embedding_space_id(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND_CONFIG)
+_embedding_cache: Optional[EmbeddingCache] = None
+_lock = threading.Lock()
+
+
+def get_model() -> Any:
+    """Return the process-wide embedding backend, loading it on first call."""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                _model = create_backend(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND_CONFIG)
+    return _model
+
+
+def fits_model(text: str) -> bool:
+    """
+    Whether the embedding model sees all of text. Beyond its token limit a
+    text is truncated, and its embedding says nothing about the rest.
+    """
+    return not get_model().truncates(text)
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, opening it on first call."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _lock:
+            if _embedding_cache is None:
+                directory = EMBEDDING_CACHE_CONFIG["directory"]
+                # Embeddings keyed by content hash, so repeated texts skip the model
+                _embedding_cache = EmbeddingCache(
+                    max_entries=EMBEDDING_CACHE_CONFIG["max_entries"],
+                    directory=(
+                        os.path.join(directory, EMBEDDING_SPACE)
+                        if directory
+                        else None
+                    ),
+                )
+    return _embedding_cache
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts, encoding only those missing from the embedding cache.
+
+    Duplicate texts are encoded once, and all misses go to the model in a
+    single batched call.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        Matrix with one L2-normalized embedding row per input text.
+    """
+    embedding_cache = get_embedding_cache()
+    unique_texts = list(dict.fromkeys(texts))
+    keys = [embedding_key(EMBEDDING_SPACE, text) for text in unique_texts]
+    embeddings = [embedding_cache.get(key) for key in keys]
+
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    metrics.inc("embedding_cache_hits_total", len(unique_texts) - len(missing))
+    if missing:
+        metrics.inc("embedding_cache_misses_total", len(missing))
+        with metrics.span("embedding_encode"):
+            encoded = get_model().encode([unique_texts[i] for i in missing])
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+        embedding_cache.put_many([(keys[i], embeddings[i]) for i in missing])
+
+    positions = {text: i for i, text in enumerate(unique_texts)}
+    unique_matrix = np.vstack(embeddings).astype(np.float32, copy=False)
+    return unique_matrix[[positions[text] for text in texts]]
+
+
+def compute_similarity_batch(pairs: List[Tuple[str, str]]) -> List[float]:
+    """
+    Compute cosine similarity for many text pairs at once.
+
+    All unique texts are embedded in one batched call, and the scores come
+    from a single row-wise dot product of the normalized embeddings.
+
+    Args:
+        pairs: (text1, text2) tuples
+
+    Returns:
+        Cosine similarity score per pair, in input order
+    """
+    if not pairs:
+        return []
+
+    with metrics.span("similarity"):
+        embeddings = encode_texts([text for pair in pairs for text in pair])
+        left, right = embeddings[0::2], embeddings[1::2]
+        similarities = np.einsum("ij,ij->i", left, right)
+
+    return [float(similarity) for similarity in similarities]
 
 
 def compute_cosine_similarity(text1: str, text2: str) -> float:
@@ -18,11 +127,4 @@ def compute_cosine_similarity(text1: str, text2: str) -> float:
     Returns:
         Cosine similarity score between 0 and 1
     """
-    # Generate sentence embeddings
-    embedding1 = model.encode([text1])
-    embedding2 = model.encode([text2])
-
-    # Calculate cosine similarity
-    similarity = cosine_similarity(embedding1, embedding2)
-
-    return float(similarity[0][0])
+    return compute_similarity_batch([(text1, text2)])[0]
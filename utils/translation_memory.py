@@ -0,0 +1,97 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+import unicodedata
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def normalize_segment(segment: str) -> str:
+    """Normalize a segment for exact matching: NFC, collapsed spaces per line."""
+    return "\n".join(
+        " ".join(line.split())
+        for line in unicodedata.normalize("NFC", segment).splitlines()
+    )
+
+
+def segment_key(kind: str, source_lang: str, target_lang: str, segment: str) -> bytes:
+    """Compact 20-byte key of a segment under a translation kind and language pair."""
+    material = "\0".join((kind, source_lang, target_lang, normalize_segment(segment)))
+    return hashlib.sha1(material.encode("utf-8")).digest()
+
+
+class TranslationMemory:
+    """
+    Exact-match translation memory on SQLite.
+
+    Translations are indexed by (kind, source_lang, target_lang, normalized
+    segment hash), where kind separates e.g. endpoint references from each
+    model's candidates. The table is a clustered WITHOUT ROWID index on the
+    20-byte hash, so opening it at startup reads nothing up front and each
+    lookup is a single B-tree probe.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Losing the last commits on power loss only costs re-translation
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS segments (
+                key BLOB PRIMARY KEY,
+                translation TEXT NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._connection.commit()
+
+    def get_many(
+        self, kind: str, source_lang: str, target_lang: str, segments: List[str]
+    ) -> List[Optional[str]]:
+        """Return the stored translation per segment, or None where unseen."""
+        keys = [
+            segment_key(kind, source_lang, target_lang, segment)
+            for segment in segments
+        ]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start : start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    self._connection.execute(
+                        "SELECT key, translation FROM segments "
+                        f"WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                )
+        return [found.get(key) for key in keys]
+
+    def put_many(
+        self,
+        kind: str,
+        source_lang: str,
+        target_lang: str,
+        segments: List[str],
+        translations: List[str],
+    ) -> None:
+        """Store translations for segments, replacing older entries."""
+        rows = [
+            (segment_key(kind, source_lang, target_lang, segment), translation)
+            for segment, translation in zip(segments, translations)
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?)", rows
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()